@@ -12,7 +12,7 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database import Base
-from models import User, Project, AgentRun
+from models import User, Project, AgentRun, RevokedToken, IdempotencyKey
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,36 @@
+"""add_revoked_tokens_table
+
+Revision ID: 731b57d7ff35
+Revises: 0f08e18f25c0
+Create Date: 2026-10-19 09:15:12.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '731b57d7ff35'
+down_revision: Union[str, None] = '0f08e18f25c0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'revoked_tokens',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('jti', sa.String(length=64), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('jti')
+    )
+    op.create_index(op.f('ix_revoked_tokens_expires_at'), 'revoked_tokens', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_revoked_tokens_expires_at'), table_name='revoked_tokens')
+    op.drop_table('revoked_tokens')
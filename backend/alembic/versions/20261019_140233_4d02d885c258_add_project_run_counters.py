@@ -0,0 +1,41 @@
+"""add_project_run_counters
+
+Revision ID: 4d02d885c258
+Revises: 731b57d7ff35
+Create Date: 2026-10-19 14:02:33.905117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d02d885c258'
+down_revision: Union[str, None] = '731b57d7ff35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('projects', sa.Column('run_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('projects', sa.Column('last_run_at', sa.DateTime(timezone=True), nullable=True))
+
+    # Backfill from existing runs
+    op.execute("""
+        UPDATE projects
+        SET run_count = counts.run_count,
+            last_run_at = counts.last_run_at
+        FROM (
+            SELECT project_id, count(*) AS run_count, max(created_at) AS last_run_at
+            FROM agent_runs
+            GROUP BY project_id
+        ) AS counts
+        WHERE projects.id = counts.project_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('projects', 'last_run_at')
+    op.drop_column('projects', 'run_count')
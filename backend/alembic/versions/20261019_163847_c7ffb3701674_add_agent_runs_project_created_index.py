@@ -0,0 +1,25 @@
+"""add_agent_runs_project_created_index
+
+Revision ID: c7ffb3701674
+Revises: 4d02d885c258
+Create Date: 2026-10-19 16:38:47.220561
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7ffb3701674'
+down_revision: Union[str, None] = '4d02d885c258'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_agent_runs_project_id_created_at', 'agent_runs', ['project_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_agent_runs_project_id_created_at', table_name='agent_runs')
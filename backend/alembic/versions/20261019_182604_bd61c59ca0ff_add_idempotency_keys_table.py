@@ -0,0 +1,42 @@
+"""add_idempotency_keys_table
+
+Revision ID: bd61c59ca0ff
+Revises: c7ffb3701674
+Create Date: 2026-10-19 18:26:04.571932
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bd61c59ca0ff'
+down_revision: Union[str, None] = 'c7ffb3701674'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'idempotency_keys',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('key', sa.String(length=255), nullable=False),
+        sa.Column('request_hash', sa.String(length=64), nullable=False),
+        sa.Column('response_status', sa.Integer(), nullable=True),
+        sa.Column('response_body', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'key', name='uq_idempotency_keys_user_id_key')
+    )
+    op.create_index(op.f('ix_idempotency_keys_expires_at'), 'idempotency_keys', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_idempotency_keys_expires_at'), table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
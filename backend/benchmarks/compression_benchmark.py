@@ -0,0 +1,82 @@
+"""
+Compression benchmark: bytes saved against added latency.
+
+Serializes a ProjectListResponse-shaped payload and compresses it with
+every encoding and level the CompressionMiddleware can pick, both in one
+shot and in streamed chunks.
+
+Usage (from backend/):
+    python -m benchmarks.compression_benchmark [--projects 500] [--repeat 50]
+"""
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+
+from middleware.compression import ENCODERS, LEVELS
+
+
+def build_payload(projects: int) -> bytes:
+    now = datetime.now(timezone.utc).isoformat()
+    return json.dumps({
+        "projects": [
+            {
+                "id": str(uuid.uuid4()),
+                "user_id": str(uuid.uuid4()),
+                "name": f"Project {i}",
+                "description": f"Service {i} handling billing, notifications and reporting for tenant {i % 17}",
+                "created_at": now,
+                "updated_at": now,
+                "run_count": i * 3,
+                "last_run_at": now,
+            }
+            for i in range(projects)
+        ],
+        "total": projects,
+    }).encode()
+
+
+def measure(encoding: str, level: int, payload: bytes, repeat: int, chunk_size: int = 0):
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        encoder = ENCODERS[encoding](level)
+        started = time.perf_counter()
+        if chunk_size:
+            chunks = [payload[i:i + chunk_size] for i in range(0, len(payload), chunk_size)]
+            data = b"".join(encoder.chunk(chunk) for chunk in chunks[:-1]) + encoder.last(chunks[-1])
+        else:
+            data = encoder.last(payload)
+        best = min(best, time.perf_counter() - started)
+        size = len(data)
+    return size, best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--projects", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--chunk-size", type=int, default=4096, help="chunk size for the streamed variant")
+    args = parser.parse_args()
+
+    payload = build_payload(args.projects)
+    print(f"Payload: {args.projects} projects, {len(payload)} bytes\n")
+    print(f"{'encoding':<8} {'level':>5} {'mode':<8} {'bytes':>9} {'saved':>7} {'added ms':>9} {'KB saved/ms':>12}")
+    for encoding in ("zstd", "br", "gzip"):
+        if encoding not in ENCODERS:
+            print(f"{encoding:<8} not installed")
+            continue
+        for level in sorted(set(LEVELS[encoding])):
+            for mode, chunk_size in (("whole", 0), ("stream", args.chunk_size)):
+                size, seconds = measure(encoding, level, payload, args.repeat, chunk_size)
+                saved = len(payload) - size
+                millis = seconds * 1000
+                print(
+                    f"{encoding:<8} {level:>5} {mode:<8} {size:>9} {saved / len(payload):>6.1%} "
+                    f"{millis:>9.3f} {saved / 1024 / millis:>12.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
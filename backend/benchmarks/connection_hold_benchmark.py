@@ -0,0 +1,71 @@
+"""
+Connection hold benchmark: pool hold time per request, with and without
+releasing connections after service calls.
+
+Runs the app in-process (needs httpx for the test client) against the
+database in DATABASE_URL. Each scenario is measured with
+DB_RELEASE_AFTER_SERVICE_CALL off, i.e. connections held until the
+response is finished, then on. The db_connection_hold_seconds histogram
+gives the time connections were checked out per request.
+
+Usage (from backend/):
+    python -m benchmarks.connection_hold_benchmark [--requests 50]
+"""
+import argparse
+import time
+import uuid
+
+from fastapi.testclient import TestClient
+
+import database
+from main import app
+
+password = "benchmark-password"
+
+
+def scenarios(client: TestClient, headers: dict, project_id: str, username: str):
+    return {
+        "GET /auth/me": lambda: client.get("/auth/me", headers=headers),
+        "GET /projects": lambda: client.get("/projects", headers=headers),
+        "GET /projects/{id}": lambda: client.get(f"/projects/{project_id}", headers=headers),
+        "POST /projects/{id}/runs": lambda: client.post(
+            f"/projects/{project_id}/runs", json={"input": "benchmark"}, headers=headers
+        ),
+        "POST /auth/login": lambda: client.post("/auth/login", data={"username": username, "password": password}),
+    }
+
+
+def measure(request, requests: int):
+    hold = database.connection_hold
+    count, total = hold.count(), hold.sum()
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = request()
+        response.raise_for_status()
+    elapsed = time.perf_counter() - started
+    checkouts = hold.count() - count
+    return (hold.sum() - total) / requests, checkouts / requests, elapsed / requests
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    with TestClient(app) as client:
+        username = f"benchmark-{uuid.uuid4().hex[:8]}"
+        token = client.post("/auth/register", json={"username": username, "password": password}).json()
+        headers = {"Authorization": f"Bearer {token['access_token']}"}
+        project_id = client.post("/projects", json={"name": "benchmark"}, headers=headers).json()["id"]
+
+        print(f"{'request':<26}{'release':>9}{'hold ms':>10}{'checkouts':>11}{'latency ms':>12}")
+        for name, request in scenarios(client, headers, project_id, username).items():
+            for release in (False, True):
+                database.DB_RELEASE_AFTER_SERVICE_CALL = release
+                request()
+                hold, checkouts, latency = measure(request, args.requests)
+                print(f"{name:<26}{'on' if release else 'off':>9}{hold * 1000:>10.2f}{checkouts:>11.1f}{latency * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Query benchmark: per-call cost of the hot lookups as legacy Query chains
+against the cached module-level statements the services now use.
+
+Seeds a user with a few projects in the database in DATABASE_URL, then
+times each lookup both ways on the same session. Database time is the
+same for both, so the difference is the Python-side cost of building,
+compiling and loading the query. The seeded rows are deleted afterwards.
+
+Usage (from backend/):
+    python -m benchmarks.query_benchmark [--calls 2000] [--projects 20]
+"""
+import argparse
+import time
+import uuid
+
+from database import Base, SessionLocal, engine
+from models.project import Project
+from models.user import User
+from services.auth_services import USER_BY_USERNAME
+from services.project_service import PROJECT_BY_ID, PROJECTS_BY_USER
+
+
+def measure(call, calls: int) -> float:
+    for _ in range(min(calls, 100)):
+        call()
+    started = time.perf_counter()
+    for _ in range(calls):
+        call()
+    return (time.perf_counter() - started) / calls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--projects", type=int, default=20)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = User(username=f"benchmark-{uuid.uuid4().hex[:8]}", password="-")
+    db.add(user)
+    db.flush()
+    projects = [Project(name=f"Project {i}", user_id=user.id) for i in range(args.projects)]
+    db.add_all(projects)
+    db.commit()
+    username, user_id, project_id = user.username, user.id, projects[0].id
+
+    lookups = {
+        "user by username": (
+            lambda: db.query(User).filter(User.username == username).first(),
+            lambda: db.execute(USER_BY_USERNAME, {"username": username}).scalar_one_or_none(),
+        ),
+        "project by id": (
+            lambda: db.query(Project).filter(Project.id == project_id).first(),
+            lambda: db.execute(PROJECT_BY_ID, {"project_id": project_id}).scalar_one_or_none(),
+        ),
+        "projects by user": (
+            lambda: db.query(Project).filter(Project.user_id == user_id).order_by(Project.created_at.desc()).all(),
+            lambda: list(db.execute(PROJECTS_BY_USER, {"user_id": user_id}).scalars()),
+        ),
+    }
+
+    try:
+        print(f"{'lookup':<20}{'legacy us':>12}{'cached us':>12}{'saved us':>11}")
+        for name, (legacy, cached) in lookups.items():
+            legacy_time = measure(legacy, args.calls)
+            cached_time = measure(cached, args.calls)
+            print(
+                f"{name:<20}{legacy_time * 1e6:>12.1f}{cached_time * 1e6:>12.1f}"
+                f"{(legacy_time - cached_time) * 1e6:>11.1f}"
+            )
+    finally:
+        db.rollback()
+        db.query(Project).filter(Project.user_id == user_id).delete()
+        db.query(User).filter(User.id == user_id).delete()
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
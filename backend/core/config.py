@@ -7,4 +7,70 @@ class Settings:
     ACCESS_TOKEN_EXPIRE_HOURS: int = os.getenv("ACCESS_TOKEN_EXPIRE_HOURS", 24)
     SECRET_KEY: str = os.getenv("SECRET_KEY", "secret_key")
 
-settings = Settings()
\ No newline at end of file
+    # Agent run ingestion
+    INGEST_BUFFER_MAX_SIZE: int = int(os.getenv("INGEST_BUFFER_MAX_SIZE", 10000))
+    INGEST_FLUSH_BATCH_SIZE: int = int(os.getenv("INGEST_FLUSH_BATCH_SIZE", 500))
+    INGEST_FLUSH_INTERVAL_MS: int = int(os.getenv("INGEST_FLUSH_INTERVAL_MS", 200))
+    INGEST_DURABILITY: str = os.getenv("INGEST_DURABILITY", "flush")
+    RUN_COUNTER_RECONCILE_INTERVAL_SECONDS: float = float(os.getenv("RUN_COUNTER_RECONCILE_INTERVAL_SECONDS", 3600))
+
+    # Token revocation
+    TOKEN_REVOCATION_BACKEND: str = os.getenv("TOKEN_REVOCATION_BACKEND", "database")
+    TOKEN_REVOCATION_SYNC_SECONDS: float = float(os.getenv("TOKEN_REVOCATION_SYNC_SECONDS", 2))
+    TOKEN_REVOCATION_PURGE_SECONDS: float = float(os.getenv("TOKEN_REVOCATION_PURGE_SECONDS", 600))
+    TOKEN_REVOCATION_SYNC_OVERLAP: int = int(os.getenv("TOKEN_REVOCATION_SYNC_OVERLAP", 100))
+
+    # Server launcher
+    HOST: str = os.getenv("HOST", "0.0.0.0")
+    PORT: int = int(os.getenv("PORT", 8000))
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", 0))
+    DB_CONNECTION_BUDGET: int = int(os.getenv("DB_CONNECTION_BUDGET", 60))
+    GRACEFUL_TIMEOUT_SECONDS: int = int(os.getenv("GRACEFUL_TIMEOUT_SECONDS", 30))
+    PRELOAD_APP: bool = os.getenv("PRELOAD_APP", "true").lower() == "true"
+
+    # Health probes
+    HEALTH_CHECK_INTERVAL_SECONDS: float = float(os.getenv("HEALTH_CHECK_INTERVAL_SECONDS", 5))
+    HEALTH_CHECK_TIMEOUT_SECONDS: float = float(os.getenv("HEALTH_CHECK_TIMEOUT_SECONDS", 2))
+
+    # Load shedding (per worker)
+    AUTH_MAX_CONCURRENCY: int = int(os.getenv("AUTH_MAX_CONCURRENCY", 8))
+    AUTH_QUEUE_TIMEOUT_MS: int = int(os.getenv("AUTH_QUEUE_TIMEOUT_MS", 2000))
+    PROJECTS_MAX_CONCURRENCY: int = int(os.getenv("PROJECTS_MAX_CONCURRENCY", 20))
+    PROJECTS_QUEUE_TIMEOUT_MS: int = int(os.getenv("PROJECTS_QUEUE_TIMEOUT_MS", 500))
+    AGENT_RUNS_MAX_CONCURRENCY: int = int(os.getenv("AGENT_RUNS_MAX_CONCURRENCY", 64))
+    AGENT_RUNS_QUEUE_TIMEOUT_MS: int = int(os.getenv("AGENT_RUNS_QUEUE_TIMEOUT_MS", 500))
+    LOAD_SHEDDING_MAX_QUEUE: int = int(os.getenv("LOAD_SHEDDING_MAX_QUEUE", 100))
+    LOAD_SHEDDING_RETRY_AFTER_SECONDS: int = int(os.getenv("LOAD_SHEDDING_RETRY_AFTER_SECONDS", 1))
+
+    # Request coalescing
+    COALESCING_MAX_KEYS: int = int(os.getenv("COALESCING_MAX_KEYS", 1024))
+
+    # Response compression
+    COMPRESSION_MINIMUM_SIZE: int = int(os.getenv("COMPRESSION_MINIMUM_SIZE", 1024))
+
+    # Idempotency keys
+    IDEMPOTENCY_KEY_TTL_HOURS: int = int(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", 24))
+    IDEMPOTENCY_LOCK_TIMEOUT_SECONDS: float = float(os.getenv("IDEMPOTENCY_LOCK_TIMEOUT_SECONDS", 60))
+    IDEMPOTENCY_WAIT_TIMEOUT_SECONDS: float = float(os.getenv("IDEMPOTENCY_WAIT_TIMEOUT_SECONDS", 10))
+    IDEMPOTENCY_SWEEP_INTERVAL_SECONDS: float = float(os.getenv("IDEMPOTENCY_SWEEP_INTERVAL_SECONDS", 300))
+    IDEMPOTENCY_SWEEP_BATCH_SIZE: int = int(os.getenv("IDEMPOTENCY_SWEEP_BATCH_SIZE", 1000))
+
+    # Password hashing. argon2 needs the optional argon2-cffi package.
+    PASSWORD_HASH_SCHEME: str = os.getenv("PASSWORD_HASH_SCHEME", "bcrypt")
+    PASSWORD_HASH_TARGET_MS: float = float(os.getenv("PASSWORD_HASH_TARGET_MS", 250))
+    PASSWORD_HASH_ROUNDS: int = int(os.getenv("PASSWORD_HASH_ROUNDS", 0))
+    PASSWORD_HASH_ARGON2_MEMORY_KB: int = int(os.getenv("PASSWORD_HASH_ARGON2_MEMORY_KB", 65536))
+    PASSWORD_HASH_ARGON2_PARALLELISM: int = int(os.getenv("PASSWORD_HASH_ARGON2_PARALLELISM", 1))
+
+    # Request profiling
+    PROFILING_SAMPLE_RATE: float = float(os.getenv("PROFILING_SAMPLE_RATE", 0))
+    PROFILING_SECRET: str = os.getenv("PROFILING_SECRET", "")
+    PROFILING_INTERVAL_MS: float = float(os.getenv("PROFILING_INTERVAL_MS", 5))
+    PROFILING_MAX_CONCURRENT: int = int(os.getenv("PROFILING_MAX_CONCURRENT", 4))
+    PROFILING_DIR: str = os.getenv("PROFILING_DIR", "/tmp/virtual-cto-profiles")
+    PROFILING_MAX_FILES: int = int(os.getenv("PROFILING_MAX_FILES", 500))
+
+    # Comma-separated usernames allowed to use the admin endpoints
+    ADMIN_USERNAMES: list = [name.strip() for name in os.getenv("ADMIN_USERNAMES", "").split(",") if name.strip()]
+
+settings = Settings()
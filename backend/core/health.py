@@ -0,0 +1,141 @@
+import asyncio
+import time
+from typing import Optional, Tuple
+
+from sqlalchemy import create_engine, text
+from starlette.concurrency import run_in_threadpool
+
+from core.config import settings
+from core.metrics import metrics
+from core.tasks import PeriodicTask
+from database import DATABASE_URL, DB_MAX_OVERFLOW, engine
+
+db_up = metrics.gauge("db_up", "Whether the last database probe succeeded")
+db_probe_latency = metrics.gauge("db_probe_latency_seconds", "Round-trip time of the last database probe")
+db_pool_checked_out = metrics.gauge("db_pool_checked_out", "Connections currently checked out of the pool")
+db_pool_capacity = metrics.gauge("db_pool_capacity", "Maximum connections the pool may hold")
+
+
+class DatabaseHealthMonitor:
+    """
+    Background task that probes the database and records the result.
+
+    Probes use a dedicated single-connection engine, so they neither
+    compete with requests for the main pool nor hang when it is exhausted.
+    Liveness and readiness endpoints answer from the recorded state.
+    """
+
+    def __init__(self, interval: float, timeout: float):
+        self.interval = interval
+        self.timeout = timeout
+        self.reachable = False
+        self.latency: Optional[float] = None
+        self.last_checked: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._probe_running = False
+        self._prober = PeriodicTask("Database health probe", interval, self._probe_with_timeout)
+
+        connect_args = {}
+        if engine.dialect.name == "postgresql":
+            connect_args["connect_timeout"] = max(1, int(timeout))
+        self._probe_engine = create_engine(
+            DATABASE_URL,
+            pool_size=1,
+            max_overflow=0,
+            pool_pre_ping=False,
+            connect_args=connect_args
+        )
+
+        db_up.set_function(lambda: 1 if self.reachable else 0)
+        db_probe_latency.set_function(lambda: self.latency or 0)
+        db_pool_checked_out.set_function(lambda: self.pool_usage()[0])
+        db_pool_capacity.set_function(lambda: self.pool_usage()[1])
+
+    def pool_usage(self) -> Tuple[int, int]:
+        """Connections checked out of the main pool and its capacity"""
+        pool = engine.pool
+        if not hasattr(pool, "size"):
+            return pool.checkedout(), 0
+        return pool.checkedout(), pool.size() + DB_MAX_OVERFLOW
+
+    def is_stale(self) -> bool:
+        """Whether the monitor has stopped producing fresh probes"""
+        if self.last_checked is None:
+            return True
+        return time.monotonic() - self.last_checked > 3 * self.interval + self.timeout
+
+    def readiness(self) -> Tuple[bool, dict]:
+        """
+        Decide whether this worker should receive traffic.
+
+        Returns:
+            (ready, state) where state describes the database and pool
+        """
+        checked_out, capacity = self.pool_usage()
+        pool_exhausted = capacity > 0 and checked_out >= capacity
+        ready = self.reachable and not self.is_stale() and not pool_exhausted
+        return ready, {
+            "database": {
+                "reachable": self.reachable,
+                "latency_ms": round(self.latency * 1000, 2) if self.latency is not None else None,
+                "stale": self.is_stale(),
+                "error": self.last_error,
+            },
+            "pool": {
+                "checked_out": checked_out,
+                "capacity": capacity,
+                "exhausted": pool_exhausted,
+            },
+        }
+
+    def probe(self) -> None:
+        """Run one round-trip to the database and record the outcome"""
+        started = time.perf_counter()
+        try:
+            with self._probe_engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+        except Exception as e:
+            self._record(False, None, str(e))
+        else:
+            self._record(True, time.perf_counter() - started, None)
+
+    def _record(self, reachable: bool, latency: Optional[float], error: Optional[str]) -> None:
+        self.reachable = reachable
+        self.latency = latency
+        self.last_error = error
+        self.last_checked = time.monotonic()
+
+    async def start(self) -> None:
+        """Probe once, then keep probing in the background"""
+        if self._prober.running:
+            return
+        await self._probe_with_timeout()
+        self._prober.start()
+
+    async def stop(self) -> None:
+        if not self._prober.running:
+            return
+        await self._prober.stop()
+        self._probe_engine.dispose()
+
+    async def _probe_with_timeout(self) -> None:
+        # A probe stuck on an unresponsive database keeps its thread busy;
+        # don't start another one until it returns.
+        if self._probe_running:
+            return
+        self._probe_running = True
+        probe = asyncio.ensure_future(run_in_threadpool(self.probe))
+        probe.add_done_callback(self._probe_finished)
+        try:
+            await asyncio.wait_for(asyncio.shield(probe), self.timeout)
+        except asyncio.TimeoutError:
+            self._record(False, None, f"Database probe timed out after {self.timeout}s")
+
+    def _probe_finished(self, probe: asyncio.Future) -> None:
+        self._probe_running = False
+
+
+database_health_monitor = DatabaseHealthMonitor(
+    interval=settings.HEALTH_CHECK_INTERVAL_SECONDS,
+    timeout=settings.HEALTH_CHECK_TIMEOUT_SECONDS
+)
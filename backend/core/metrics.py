@@ -0,0 +1,195 @@
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(label_names: Sequence[str], label_values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """Base class for in-process metrics rendered in Prometheus text format"""
+    metric_type = "untyped"
+
+    def __init__(self, name: str, description: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.metric_type}"]
+        lines.extend(self._render_samples())
+        return lines
+
+    def _render_samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing value"""
+    metric_type = "counter"
+
+    def __init__(self, name: str, description: str, label_names: Sequence[str] = ()):
+        super().__init__(name, description, label_names)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _render_samples(self) -> Iterable[str]:
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.label_names, key)} {value}"
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, either set directly or read from a callback"""
+    metric_type = "gauge"
+
+    def __init__(self, name: str, description: str, label_names: Sequence[str] = ()):
+        super().__init__(name, description, label_names)
+        self._values: Dict[LabelValues, float] = {}
+        self._callbacks: Dict[LabelValues, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, callback: Callable[[], float], **labels: str) -> None:
+        """Read the gauge value from a callback at render time"""
+        with self._lock:
+            self._callbacks[self._key(labels)] = callback
+
+    def value(self, **labels: str) -> float:
+        key = self._key(labels)
+        callback = self._callbacks.get(key)
+        return callback() if callback else self._values.get(key, 0)
+
+    def _render_samples(self) -> Iterable[str]:
+        with self._lock:
+            items = dict(self._values)
+            callbacks = dict(self._callbacks)
+        for key, callback in callbacks.items():
+            items[key] = callback()
+        for key, value in items.items():
+            yield f"{self.name}{_format_labels(self.label_names, key)} {value}"
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over cumulative buckets"""
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, description, label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self._sums[key] += value
+
+    def count(self, **labels: str) -> int:
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def sum(self, **labels: str) -> float:
+        return self._sums.get(self._key(labels), 0.0)
+
+    def _render_samples(self) -> Iterable[str]:
+        with self._lock:
+            items = [(key, list(counts), self._sums[key]) for key, counts in self._counts.items()]
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.label_names, key, f'le="{bound}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            cumulative += counts[-1]
+            labels = _format_labels(self.label_names, key, 'le="+Inf"')
+            yield f"{self.name}_bucket{labels} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.label_names, key)} {total}"
+            yield f"{self.name}_count{_format_labels(self.label_names, key)} {cumulative}"
+
+
+class MetricsRegistry:
+    """Process-local registry of metrics exposed on /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, description: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, description, label_names))
+
+    def gauge(self, name: str, description: str, label_names: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, description, label_names))
+
+    def histogram(
+        self,
+        name: str,
+        description: str,
+        label_names: Sequence[str] = (),
+        buckets: Optional[Sequence[float]] = None,
+    ) -> Histogram:
+        return self._register(Histogram(name, description, label_names, buckets or DEFAULT_BUCKETS))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
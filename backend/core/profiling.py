@@ -0,0 +1,302 @@
+import asyncio
+import contextvars
+import functools
+import hashlib
+import hmac
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter as FrameCounter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from core.config import settings
+from core.metrics import metrics
+
+profiles_captured = metrics.counter(
+    "profiling_profiles_captured_total",
+    "Request profiles written to disk, by what triggered them",
+    label_names=["trigger"]
+)
+profiles_skipped = metrics.counter(
+    "profiling_profiles_skipped_total",
+    "Profile requests ignored because too many profiles were already running"
+)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Profile owning the current context. Worker threads run sync dependencies
+# and endpoints in a copy of the request's context, so they inherit it.
+current_profile: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar(
+    "current_profile", default=None
+)
+
+
+def _secret() -> bytes:
+    return (settings.PROFILING_SECRET or settings.SECRET_KEY).encode()
+
+
+def sign_profile_token(expires_at: int) -> str:
+    """Create an X-Profile header value valid until expires_at (unix seconds)"""
+    signature = hmac.new(_secret(), str(expires_at).encode(), hashlib.sha256).hexdigest()
+    return f"{expires_at}.{signature}"
+
+
+def verify_profile_token(token: str) -> bool:
+    expires_at, _, signature = token.partition(".")
+    if not expires_at.isdigit() or int(expires_at) < time.time():
+        return False
+    expected = hmac.new(_secret(), expires_at.encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(BACKEND_DIR + os.sep):
+        filename = os.path.relpath(filename, BACKEND_DIR)
+    elif "site-packages" + os.sep in filename:
+        filename = filename.split("site-packages" + os.sep, 1)[1]
+    else:
+        filename = os.path.basename(filename)
+    return f"{filename}:{code.co_qualname}"
+
+
+@dataclass
+class RequestProfile:
+    """Samples collected for one request, as collapsed stacks"""
+    method: str
+    path: str
+    trigger: str
+    started_at: float = field(default_factory=time.time)
+    stacks: FrameCounter = field(default_factory=FrameCounter)
+    samples: int = 0
+
+    def add(self, stack: Tuple[str, ...]) -> None:
+        self.stacks[";".join(stack)] += 1
+        self.samples += 1
+
+
+class StackSampler:
+    """
+    Statistical profiler attributing thread stacks to in-flight requests.
+
+    A daemon thread wakes every interval while at least one profile is
+    active and reads every thread's current frame. On the event loop
+    thread a sample belongs to the request whose task is running; on a
+    threadpool worker it belongs to the request whose context the worker
+    is running in. Stacks are cut at the request's entry point, so they
+    hold only the frames spent on that request. Time a request spends
+    awaiting I/O on the event loop is not sampled.
+    """
+
+    def __init__(self, interval: float, max_concurrent: int):
+        self.interval = interval
+        self.max_concurrent = max_concurrent
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._by_task: Dict[asyncio.Task, RequestProfile] = {}
+        self._loops: Dict[int, asyncio.AbstractEventLoop] = {}
+        self._root_codes: Set = set()
+        self._labels: Dict[object, str] = {}
+
+    def add_root(self, code) -> None:
+        """Register a code object below which frames are not recorded"""
+        self._root_codes.add(code)
+
+    def begin(self, profile: RequestProfile) -> Optional[contextvars.Token]:
+        """Start sampling the current task, or return None when at capacity"""
+        task = asyncio.current_task()
+        with self._lock:
+            if len(self._by_task) >= self.max_concurrent:
+                profiles_skipped.inc()
+                return None
+            self._by_task[task] = profile
+            self._loops[threading.get_ident()] = asyncio.get_running_loop()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return current_profile.set(profile)
+
+    def end(self, token: contextvars.Token) -> None:
+        current_profile.reset(token)
+        with self._lock:
+            self._by_task.pop(asyncio.current_task(), None)
+
+    def _run(self) -> None:
+        own_ident = threading.get_ident()
+        while True:
+            self._wake.wait()
+            with self._lock:
+                if not self._by_task:
+                    self._wake.clear()
+                    continue
+                by_task = dict(self._by_task)
+                loops = dict(self._loops)
+
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                if ident in loops:
+                    profile = by_task.get(asyncio.tasks._current_tasks.get(loops[ident]))
+                else:
+                    profile = self._worker_profile(frame)
+                if profile is not None:
+                    profile.add(self._stack(frame))
+            frame = None
+            time.sleep(self.interval)
+
+    def _worker_profile(self, frame) -> Optional[RequestProfile]:
+        # Threadpool workers call the function through context.run(); find
+        # that context in the worker loop's frame to see whose request it
+        # is, as long as the function is still running rather than the
+        # worker reporting its result.
+        callee = None
+        while frame is not None:
+            if frame.f_code in self._root_codes:
+                context = frame.f_locals.get("context")
+                func = frame.f_locals.get("func")
+                while isinstance(func, functools.partial):
+                    func = func.func
+                if (
+                    isinstance(context, contextvars.Context)
+                    and callee is not None
+                    and callee.f_code is getattr(func, "__code__", None)
+                ):
+                    return context.get(current_profile)
+                return None
+            callee, frame = frame, frame.f_back
+        return None
+
+    def _stack(self, frame) -> Tuple[str, ...]:
+        stack: List[str] = []
+        while frame is not None and frame.f_code not in self._root_codes:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                label = self._labels[code] = _frame_label(code)
+            stack.append(label)
+            frame = frame.f_back
+        stack.reverse()
+        return tuple(stack)
+
+
+class ProfileStore:
+    """Rotating directory of request profiles, one JSON file each"""
+
+    def __init__(self, directory: str, max_files: int):
+        self.directory = directory
+        self.max_files = max_files
+
+    def write(self, profile: RequestProfile, route: str, status_code: int, duration: float, interval: float) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{int(profile.started_at * 1000):015d}-{uuid.uuid4().hex[:8]}.json"
+        document = {
+            "route": route,
+            "method": profile.method,
+            "path": profile.path,
+            "status_code": status_code,
+            "trigger": profile.trigger,
+            "started_at": profile.started_at,
+            "duration_ms": round(duration * 1000, 3),
+            "interval_ms": interval * 1000,
+            "samples": profile.samples,
+            "stacks": dict(profile.stacks),
+        }
+        temporary = os.path.join(self.directory, f".{name}.tmp")
+        with open(temporary, "w") as f:
+            json.dump(document, f)
+        os.replace(temporary, os.path.join(self.directory, name))
+        profiles_captured.inc(trigger=profile.trigger)
+        self._rotate()
+
+    def _rotate(self) -> None:
+        names = sorted(name for name in os.listdir(self.directory) if name.endswith(".json"))
+        for name in names[:max(0, len(names) - self.max_files)]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def load(self, since: float) -> List[dict]:
+        """Profiles of requests started at or after since (unix seconds)"""
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".json") or int(name.split("-", 1)[0]) < since * 1000:
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    profiles.append(json.load(f))
+            except (FileNotFoundError, ValueError):
+                # Rotated away or still being replaced
+                continue
+        return profiles
+
+    def hot_frames(self, since: float, top: int) -> List[dict]:
+        """
+        Aggregate profiles per route into their hottest frames.
+
+        Args:
+            since: Only include requests started at or after this time
+            top: Number of frames to return per route
+
+        Returns:
+            One entry per route with its frames ranked by self samples
+        """
+        routes: Dict[str, dict] = {}
+        for profile in self.load(since):
+            key = f'{profile["method"]} {profile["route"]}'
+            entry = routes.setdefault(key, {
+                "route": key,
+                "profiles": 0,
+                "samples": 0,
+                "self": FrameCounter(),
+                "total": FrameCounter(),
+            })
+            entry["profiles"] += 1
+            entry["samples"] += profile["samples"]
+            for stack, count in profile["stacks"].items():
+                frames = stack.split(";") if stack else ["<idle>"]
+                entry["self"][frames[-1]] += count
+                for frame in set(frames):
+                    entry["total"][frame] += count
+
+        report = []
+        for entry in sorted(routes.values(), key=lambda e: e["samples"], reverse=True):
+            samples = entry["samples"] or 1
+            frames = sorted(entry["total"], key=lambda f: (entry["self"][f], entry["total"][f]), reverse=True)
+            report.append({
+                "route": entry["route"],
+                "profiles": entry["profiles"],
+                "samples": entry["samples"],
+                "frames": [
+                    {
+                        "frame": frame,
+                        "self_samples": entry["self"][frame],
+                        "total_samples": entry["total"][frame],
+                        "self_percent": round(100 * entry["self"][frame] / samples, 2),
+                        "total_percent": round(100 * entry["total"][frame] / samples, 2),
+                    }
+                    for frame in frames[:top]
+                ],
+            })
+        return report
+
+
+stack_sampler = StackSampler(
+    interval=settings.PROFILING_INTERVAL_MS / 1000,
+    max_concurrent=settings.PROFILING_MAX_CONCURRENT
+)
+try:
+    from anyio._backends._asyncio import WorkerThread
+    stack_sampler.add_root(WorkerThread.run.__code__)
+except (ImportError, AttributeError):
+    # Without it, time in threadpool workers goes unsampled
+    pass
+profile_store = ProfileStore(settings.PROFILING_DIR, settings.PROFILING_MAX_FILES)
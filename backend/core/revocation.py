@@ -0,0 +1,187 @@
+import heapq
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+
+from core.config import settings
+from core.metrics import metrics
+from core.tasks import PeriodicTask
+from database import engine
+from models.revoked_token import RevokedToken
+
+revoked_tokens_gauge = metrics.gauge(
+    "revoked_tokens_cached",
+    "Unexpired revoked token ids held in memory by this worker"
+)
+revocation_sync_errors = metrics.counter(
+    "token_revocation_sync_errors_total",
+    "Failed attempts to sync token revocations from the backend"
+)
+
+Revocation = Tuple[str, float]
+
+
+class RevocationBackend:
+    """Shares token revocations between workers"""
+
+    def publish(self, jti: str, expires_at: float) -> None:
+        """Record a revocation so other workers pick it up"""
+        raise NotImplementedError
+
+    def fetch(self, cursor: int) -> Tuple[List[Revocation], int]:
+        """Return unexpired revocations recorded after the cursor, and the new cursor"""
+        raise NotImplementedError
+
+    def purge_expired(self) -> None:
+        """Drop revocations whose tokens have expired anyway"""
+
+
+class InMemoryRevocationBackend(RevocationBackend):
+    """Backend for a single worker process; nothing is shared"""
+
+    def publish(self, jti: str, expires_at: float) -> None:
+        pass
+
+    def fetch(self, cursor: int) -> Tuple[List[Revocation], int]:
+        return [], cursor
+
+
+class DatabaseRevocationBackend(RevocationBackend):
+    """
+    Backend that shares revocations through the revoked_tokens table.
+
+    Ids come from a sequence and are assigned before commit, so a row can
+    become visible after rows with higher ids were already fetched. Each
+    fetch therefore re-reads the last `overlap` ids before the cursor;
+    revocations seen twice are ignored by the store.
+    """
+
+    def __init__(self, fetch_limit: int = 1000, overlap: int = 100):
+        self.fetch_limit = fetch_limit
+        self.overlap = overlap
+
+    def publish(self, jti: str, expires_at: float) -> None:
+        try:
+            with engine.begin() as connection:
+                connection.execute(insert(RevokedToken).values(
+                    jti=jti,
+                    expires_at=datetime.fromtimestamp(expires_at, tz=timezone.utc)
+                ))
+        except IntegrityError:
+            # Already revoked, e.g. a repeated logout with the same token
+            pass
+
+    def fetch(self, cursor: int) -> Tuple[List[Revocation], int]:
+        now = datetime.now(timezone.utc)
+        revocations: List[Revocation] = []
+        after = max(cursor - self.overlap, 0)
+        with engine.connect() as connection:
+            while True:
+                rows = connection.execute(
+                    select(RevokedToken.id, RevokedToken.jti, RevokedToken.expires_at)
+                    .where(RevokedToken.id > after, RevokedToken.expires_at > now)
+                    .order_by(RevokedToken.id)
+                    .limit(self.fetch_limit)
+                ).all()
+                for row in rows:
+                    revocations.append((row.jti, row.expires_at.timestamp()))
+                    after = row.id
+                if len(rows) < self.fetch_limit:
+                    return revocations, max(cursor, after)
+
+    def purge_expired(self) -> None:
+        with engine.begin() as connection:
+            connection.execute(
+                delete(RevokedToken).where(RevokedToken.expires_at <= datetime.now(timezone.utc))
+            )
+
+
+class TokenRevocationStore:
+    """
+    Process-local set of revoked token ids, kept in sync with a backend.
+
+    Lookups are a single dict membership test with no I/O. Entries are
+    indexed by expiry and dropped once the token would be rejected as
+    expired anyway. Revocations made by other workers become visible
+    after at most one sync interval.
+    """
+
+    def __init__(self, backend: RevocationBackend, sync_interval: float, purge_interval: float):
+        self.backend = backend
+        self.sync_interval = sync_interval
+        self.purge_interval = purge_interval
+        self._revoked: Dict[str, float] = {}
+        self._expiry_heap: List[Revocation] = []
+        self._cursor = 0
+        self._lock = threading.Lock()
+        self._last_purge = time.monotonic()
+        self._syncer = PeriodicTask("Token revocation sync", sync_interval, self._sync_in_background)
+        revoked_tokens_gauge.set_function(lambda: len(self._revoked))
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        """Check whether a token id has been revoked"""
+        return jti in self._revoked
+
+    def revoke(self, jti: str, expires_at: float) -> None:
+        """Revoke a token id until the token's own expiry"""
+        self._add([(jti, expires_at)])
+        self.backend.publish(jti, expires_at)
+
+    def sync(self) -> None:
+        """Pull revocations published by other workers"""
+        revocations, self._cursor = self.backend.fetch(self._cursor)
+        self._add(revocations)
+
+    def _add(self, revocations: List[Revocation]) -> None:
+        now = time.time()
+        with self._lock:
+            for jti, expires_at in revocations:
+                if expires_at > now and jti not in self._revoked:
+                    self._revoked[jti] = expires_at
+                    heapq.heappush(self._expiry_heap, (expires_at, jti))
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                _, expired_jti = heapq.heappop(self._expiry_heap)
+                self._revoked.pop(expired_jti, None)
+
+    async def start(self) -> None:
+        """Load current revocations and start syncing in the background"""
+        if self._syncer.running:
+            return
+        try:
+            await run_in_threadpool(self.sync)
+        except Exception as e:
+            revocation_sync_errors.inc()
+            print(f"Token revocation sync failed: {e}")
+        self._last_purge = time.monotonic()
+        self._syncer.start()
+
+    async def stop(self) -> None:
+        await self._syncer.stop()
+
+    async def _sync_in_background(self) -> None:
+        try:
+            await run_in_threadpool(self.sync)
+            if time.monotonic() - self._last_purge >= self.purge_interval:
+                await run_in_threadpool(self.backend.purge_expired)
+                self._last_purge = time.monotonic()
+        except Exception:
+            revocation_sync_errors.inc()
+            raise
+
+
+def _create_backend() -> RevocationBackend:
+    if settings.TOKEN_REVOCATION_BACKEND == "memory":
+        return InMemoryRevocationBackend()
+    return DatabaseRevocationBackend(overlap=settings.TOKEN_REVOCATION_SYNC_OVERLAP)
+
+
+token_revocation_store = TokenRevocationStore(
+    backend=_create_backend(),
+    sync_interval=settings.TOKEN_REVOCATION_SYNC_SECONDS,
+    purge_interval=settings.TOKEN_REVOCATION_PURGE_SECONDS
+)
@@ -1,12 +1,107 @@
+import functools
+import math
+import time
+import uuid
+from dataclasses import dataclass
 from passlib.context import CryptContext
+from passlib.hash import argon2, bcrypt
 from datetime import timedelta, datetime, timezone
 from typing import Optional
 from core.config import settings
+from core.revocation import token_revocation_store
 from jose import JWTError, jwt
 from fastapi import HTTPException
 
 password_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Calibration never goes below these, however slow the machine
+BCRYPT_MIN_ROUNDS = 10
+BCRYPT_MAX_ROUNDS = 31
+ARGON2_MIN_TIME_COST = 1
+
+
+@dataclass(frozen=True)
+class PasswordHashPolicy:
+    """Hash parameters chosen for this machine"""
+    scheme: str
+    rounds: int
+    hash_ms: float
+
+
+def _time_hash(hasher, samples: int = 3) -> float:
+    """Fastest of a few hashes, in seconds"""
+    best = math.inf
+    for _ in range(samples):
+        started = time.perf_counter()
+        hasher.hash("calibration-password")
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _calibrate_bcrypt(target: float) -> int:
+    # Each extra round doubles the work
+    base = _time_hash(bcrypt.using(rounds=BCRYPT_MIN_ROUNDS))
+    extra = math.floor(math.log2(target / base)) if target > base else 0
+    return min(BCRYPT_MAX_ROUNDS, BCRYPT_MIN_ROUNDS + extra)
+
+
+def _calibrate_argon2(target: float) -> int:
+    # Work grows linearly with time_cost at a fixed memory cost
+    base = _time_hash(argon2.using(
+        rounds=1,
+        memory_cost=settings.PASSWORD_HASH_ARGON2_MEMORY_KB,
+        parallelism=settings.PASSWORD_HASH_ARGON2_PARALLELISM
+    ))
+    return max(ARGON2_MIN_TIME_COST, math.floor(target / base))
+
+
+@functools.lru_cache(maxsize=None)
+def configure_password_context() -> PasswordHashPolicy:
+    """
+    Pick password hash parameters for this machine and apply them.
+
+    Unless PASSWORD_HASH_ROUNDS pins the cost, the largest cost whose hash
+    time stays within PASSWORD_HASH_TARGET_MS is used. Stored hashes of
+    a weaker cost, or of the other scheme, report needs_update so they are
+    upgraded on the next login. Runs once per process; call it before
+    forking workers so they share the result.
+
+    Returns:
+        The chosen scheme, cost and measured hash time
+    """
+    scheme = settings.PASSWORD_HASH_SCHEME
+    if scheme == "argon2" and not argon2.has_backend():
+        print("PASSWORD_HASH_SCHEME is argon2 but argon2-cffi is not installed, using bcrypt")
+        scheme = "bcrypt"
+
+    target = settings.PASSWORD_HASH_TARGET_MS / 1000
+    rounds = settings.PASSWORD_HASH_ROUNDS
+    if not rounds:
+        rounds = _calibrate_argon2(target) if scheme == "argon2" else _calibrate_bcrypt(target)
+
+    schemes = [scheme] + [other for other in ("argon2", "bcrypt") if other != scheme]
+    if not argon2.has_backend():
+        schemes.remove("argon2")
+    options = {
+        "schemes": schemes,
+        "default": scheme,
+        "deprecated": "auto",
+        f"{scheme}__rounds": rounds,
+        f"{scheme}__min_rounds": rounds,
+    }
+    if scheme == "argon2":
+        options["argon2__memory_cost"] = settings.PASSWORD_HASH_ARGON2_MEMORY_KB
+        options["argon2__parallelism"] = settings.PASSWORD_HASH_ARGON2_PARALLELISM
+    password_context.load(options)
+
+    policy = PasswordHashPolicy(scheme=scheme, rounds=rounds, hash_ms=_time_hash(password_context, samples=1) * 1000)
+    print(
+        f"Password hashing: {policy.scheme} cost {policy.rounds}, "
+        f"{policy.hash_ms:.0f}ms per hash (target {settings.PASSWORD_HASH_TARGET_MS:.0f}ms)"
+    )
+    return policy
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -16,7 +111,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.now(timezone.utc) + timedelta(hours=settings.ACCESS_TOKEN_EXPIRE_HOURS)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY)
 
     return encoded_jwt
@@ -25,14 +120,21 @@ def verify_token(token: str) -> dict:
     """Verify a JWT access token"""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY)
-        return payload
     except JWTError:
         raise HTTPException(status_code=401, detail="Could not verify token")
 
+    if token_revocation_store.is_revoked(payload.get("jti")):
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+    return payload
+
 def hash_password(password: str) -> str:
     """Hash a password"""
     return password_context.hash(password)
 
 def verify_password(password: str, hashed_password: str) -> bool:
     """Verify a password"""
-    return password_context.verify(password, hashed_password)
\ No newline at end of file
+    return password_context.verify(password, hashed_password)
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Whether a stored hash is weaker than the current policy"""
+    return password_context.needs_update(hashed_password)
\ No newline at end of file
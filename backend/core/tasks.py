@@ -0,0 +1,47 @@
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+
+class PeriodicTask:
+    """
+    Background task calling a coroutine function every interval.
+
+    The first call happens one interval after start(). A failing call is
+    logged and the next one runs on schedule. An interval of zero or less
+    disables the task.
+    """
+
+    def __init__(self, name: str, interval: float, callback: Callable[[], Awaitable[None]]):
+        self.name = name
+        self.interval = interval
+        self.callback = callback
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self) -> None:
+        """Start calling the callback on the running event loop"""
+        if self._task is not None or self.interval <= 0:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run(), name=self.name)
+
+    async def stop(self) -> None:
+        """Cancel the task, including a call in progress"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.callback()
+            except Exception as e:
+                print(f"{self.name} failed: {e}")
@@ -1,28 +1,81 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from dotenv import load_dotenv
 import os
+import time
+
+from core.metrics import metrics
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://cto:cto_pass@db:5432/virtual_cto")
 
+# Per-process pool limits; server.py derives them from DB_CONNECTION_BUDGET
+# when running several workers
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+
+# psycopg 3 (postgresql+psycopg://) prepares a statement server-side once
+# it has run this many times on a connection; psycopg2 cannot prepare
+connect_args = {}
+if make_url(DATABASE_URL).get_driver_name() == "psycopg":
+    connect_args["prepare_threshold"] = int(os.getenv("DB_PREPARE_THRESHOLD", 5))
+
 engine = create_engine(
     DATABASE_URL,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    connect_args=connect_args
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# End read transactions as soon as the data is loaded rather than when
+# the request finishes; see release_connection
+DB_RELEASE_AFTER_SERVICE_CALL = os.getenv("DB_RELEASE_AFTER_SERVICE_CALL", "true").lower() == "true"
+
+connection_hold = metrics.histogram(
+    "db_connection_hold_seconds",
+    "Time a connection stays checked out of the pool",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+
+
+@event.listens_for(engine, "checkout")
+def _record_checkout(dbapi_connection, connection_record, connection_proxy):
+    connection_record.info["checked_out_at"] = time.perf_counter()
+
+
+@event.listens_for(engine, "checkin")
+def _record_checkin(dbapi_connection, connection_record):
+    checked_out_at = connection_record.info.pop("checked_out_at", None)
+    if checked_out_at is not None:
+        connection_hold.observe(time.perf_counter() - checked_out_at)
+
+
+# Loaded objects stay usable after commit, so a session can hand its
+# connection back and the response is still serialized from them
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 Base = declarative_base()
 
 def get_db():
+    # Sessions only check out a connection when they first run a query
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
+def release_connection(db: Session) -> None:
+    """
+    End the session's transaction so its connection returns to the pool.
+
+    Call it once the data a request needs is loaded, before slow work
+    that doesn't touch the database. The session checks out a new
+    connection if it is used again.
+    """
+    if DB_RELEASE_AFTER_SERVICE_CALL and db.in_transaction():
+        db.commit()
+
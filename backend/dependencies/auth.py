@@ -2,19 +2,25 @@ from fastapi import Depends
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from typing import Optional
-from database import get_db
+from database import get_db, release_connection
 from models.user import User
+from core.config import settings
 from core.security import verify_token
-from exceptions.exceptions import AuthenticationException, InactiveUserException
+from services.auth_services import AuthService
+from exceptions.exceptions import AuthenticationException, InactiveUserException, AdminPrivilegesRequiredException
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+def get_token_payload(token: str = Depends(oauth2_scheme)) -> dict:
+    """Get the verified claims of the request's JWT token."""
+    return verify_token(token)
+
+
 def get_current_user(
-    token: str = Depends(oauth2_scheme),
+    payload: dict = Depends(get_token_payload),
     db: Session = Depends(get_db)
 ) -> User:
     """Get the current authenticated user from JWT token."""
-    payload = verify_token(token)
     if payload is None:
         raise AuthenticationException()
     
@@ -22,7 +28,8 @@ def get_current_user(
     if username is None:
         raise AuthenticationException()
     
-    user = db.query(User).filter(User.username == username).first()
+    user = AuthService(db).get_user_by_username(username)
+    release_connection(db)
     if user is None:
         raise AuthenticationException()
     
@@ -35,4 +42,13 @@ def get_current_active_user(
     """Get the current active user."""
     if not current_user.is_active:
         raise InactiveUserException()
+    return current_user
+
+
+def get_current_admin_user(
+    current_user: User = Depends(get_current_active_user)
+) -> User:
+    """Get the current user, who must be listed in ADMIN_USERNAMES."""
+    if current_user.username not in settings.ADMIN_USERNAMES:
+        raise AdminPrivilegesRequiredException()
     return current_user
\ No newline at end of file
@@ -66,4 +66,59 @@ class ProjectAccessDeniedException(BaseAPIException):
         super().__init__(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission to access this project"
-        )
\ No newline at end of file
+        )
+
+class IngestionBufferFullException(BaseAPIException):
+    """Raised when the agent run ingestion buffer cannot accept more runs"""
+    def __init__(self, retry_after: int = 1):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Agent run ingestion buffer is full, retry later",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+
+class IngestionBatchTooLargeException(BaseAPIException):
+    """Raised when a single request carries more runs than the ingestion buffer holds"""
+    def __init__(self, max_size: int):
+        super().__init__(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {max_size} agent runs can be sent per request"
+        )
+
+
+class IngestionFailedException(BaseAPIException):
+    """Raised when buffered agent runs could not be written to the database"""
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Agent runs could not be persisted, retry later"
+        )
+
+
+class IdempotencyKeyMismatchException(BaseAPIException):
+    """Raised when an idempotency key is reused for a different request"""
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used for a different request"
+        )
+
+
+class IdempotencyKeyInProgressException(BaseAPIException):
+    """Raised when the original request for an idempotency key is still running"""
+    def __init__(self, retry_after: int = 1):
+        super().__init__(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still being processed",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+
+class AdminPrivilegesRequiredException(BaseAPIException):
+    """Raised when a non-admin user calls an admin endpoint"""
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required"
+        )
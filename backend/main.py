@@ -1,10 +1,20 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
 from sqlalchemy import text
-from database import engine, get_db, Base
+from starlette.concurrency import run_in_threadpool
+from database import engine, Base
 from models import *
 from routers import *
+from middleware import LoadSheddingMiddleware, RouteBudget, CoalescingMiddleware, CompressionMiddleware, ProfilingMiddleware
+from core.config import settings
+from services.run_ingestion import run_ingestion_buffer
+from services.run_counters import run_counter_reconciler
+from services.idempotency_service import idempotency_key_sweeper
+from core.revocation import token_revocation_store
+from core.health import database_health_monitor
+from core.profiling import stack_sampler, profile_store
+from core.security import configure_password_context
+from services.password_rehash import password_rehasher
 
 Base.metadata.create_all(bind=engine)
 
@@ -14,6 +24,56 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Innermost, so only admitted requests are profiled and the scope it
+# reads the matched route from is the one the router writes to
+app.add_middleware(
+    ProfilingMiddleware,
+    sampler=stack_sampler,
+    store=profile_store,
+    sample_rate=settings.PROFILING_SAMPLE_RATE
+)
+
+# Auth and project CRUD get separate budgets so a flood of one can't starve
+# the other. Registered before CORS so shed responses still carry CORS headers.
+app.add_middleware(
+    LoadSheddingMiddleware,
+    budgets=[
+        RouteBudget(
+            name="auth",
+            pattern=r"^/auth/",
+            max_concurrency=settings.AUTH_MAX_CONCURRENCY,
+            queue_timeout=settings.AUTH_QUEUE_TIMEOUT_MS / 1000,
+            max_queue=settings.LOAD_SHEDDING_MAX_QUEUE
+        ),
+        RouteBudget(
+            name="agent_runs",
+            pattern=r"^/projects/[^/]+/runs$",
+            max_concurrency=settings.AGENT_RUNS_MAX_CONCURRENCY,
+            queue_timeout=settings.AGENT_RUNS_QUEUE_TIMEOUT_MS / 1000,
+            max_queue=settings.LOAD_SHEDDING_MAX_QUEUE
+        ),
+        RouteBudget(
+            name="projects",
+            pattern=r"^/projects",
+            max_concurrency=settings.PROJECTS_MAX_CONCURRENCY,
+            queue_timeout=settings.PROJECTS_QUEUE_TIMEOUT_MS / 1000,
+            max_queue=settings.LOAD_SHEDDING_MAX_QUEUE
+        ),
+    ],
+    retry_after=settings.LOAD_SHEDDING_RETRY_AFTER_SECONDS
+)
+
+# Identical concurrent reads of the same principal share one execution,
+# which also means they take a single load shedding slot.
+app.add_middleware(
+    CoalescingMiddleware,
+    patterns=[r"^/auth/me$", r"^/projects$", r"^/projects/[^/]+$"],
+    max_keys=settings.COALESCING_MAX_KEYS
+)
+
+# Outside coalescing, so each request gets the encoding it asked for
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -24,6 +84,9 @@ app.add_middleware(
 
 app.include_router(auth_router)
 app.include_router(project_router)
+app.include_router(agent_run_router)
+app.include_router(metrics_router)
+app.include_router(admin_router)
 
 @app.on_event("startup")
 async def startup_event():
@@ -35,6 +98,26 @@ async def startup_event():
     except Exception as e:
         print(f"Database connection failed: {e}")
 
+    # Already done before forking when started through server.py
+    await run_in_threadpool(configure_password_context)
+
+    run_ingestion_buffer.start()
+    run_counter_reconciler.start()
+    idempotency_key_sweeper.start()
+    await token_revocation_store.start()
+    await database_health_monitor.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush buffered agent runs and stop background tasks before the process exits"""
+    await run_ingestion_buffer.stop()
+    await run_counter_reconciler.stop()
+    await idempotency_key_sweeper.stop()
+    await token_revocation_store.stop()
+    await database_health_monitor.stop()
+    await password_rehasher.stop()
+
 
 @app.get("/")
 async def root():
@@ -42,18 +125,35 @@ async def root():
 
 
 @app.get("/health")
-async def health_check(db: Session = Depends(get_db)):
-    """Health check endpoint that also verifies database connection"""
-    try:
-        db.execute(text("SELECT 1"))
+async def health_check():
+    """Health check endpoint reporting the last background database probe"""
+    if database_health_monitor.reachable:
         return {
             "status": "healthy",
             "database": "connected"
         }
-    except Exception as e:
-        return {
-            "status": "unhealthy",
-            "database": "disconnected",
-            "error": str(e)
-        }
+    return {
+        "status": "unhealthy",
+        "database": "disconnected",
+        "error": database_health_monitor.last_error
+    }
+
+
+@app.get("/live")
+async def liveness_check():
+    """Liveness probe: the process is up and its event loop is responsive"""
+    return {"status": "alive"}
+
 
+@app.get("/ready")
+async def readiness_check(response: Response):
+    """
+    Readiness probe answered from the background database monitor.
+    
+    Returns 503 while the database is unreachable, the monitor is stale or
+    the connection pool is exhausted, so traffic is shed instead of queuing.
+    """
+    ready, state = database_health_monitor.readiness()
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"status": "ready" if ready else "not ready", **state}
@@ -0,0 +1,6 @@
+from .load_shedding import LoadSheddingMiddleware, RouteBudget
+from .coalescing import CoalescingMiddleware
+from .compression import CompressionMiddleware
+from .profiling import ProfilingMiddleware
+
+__all__ = ["LoadSheddingMiddleware", "RouteBudget", "CoalescingMiddleware", "CompressionMiddleware", "ProfilingMiddleware"]
\ No newline at end of file
@@ -0,0 +1,128 @@
+import asyncio
+import hashlib
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Pattern, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.metrics import metrics
+
+requests_coalesced = metrics.counter(
+    "coalescing_requests_coalesced_total",
+    "Requests answered from another identical request already in flight",
+    label_names=["route"]
+)
+requests_bypassed = metrics.counter(
+    "coalescing_requests_bypassed_total",
+    "Coalescable requests executed on their own because the key table was full"
+)
+keys_in_flight = metrics.gauge(
+    "coalescing_keys_in_flight",
+    "Distinct coalescable requests currently executing"
+)
+
+CoalescingKey = Tuple[str, bytes, str]
+
+
+@dataclass
+class _CapturedResponse:
+    start: Message
+    body: List[bytes] = field(default_factory=list)
+
+
+class CoalescingMiddleware:
+    """
+    ASGI middleware collapsing identical concurrent GET requests.
+
+    Requests are identical when they share path, query string and
+    Authorization header. The first one runs the application; duplicates
+    arriving while it is in flight wait for it and receive a copy of its
+    response, or its exception. Nothing is cached once the response is
+    complete. When max_keys distinct requests are already in flight, new
+    ones run uncoalesced.
+    """
+
+    def __init__(self, app: ASGIApp, patterns: List[str], max_keys: int = 1024):
+        self.app = app
+        self.max_keys = max_keys
+        self._patterns: List[Pattern] = [re.compile(pattern) for pattern in patterns]
+        self._in_flight: Dict[CoalescingKey, asyncio.Task] = {}
+        keys_in_flight.set_function(lambda: len(self._in_flight))
+
+    def _match(self, scope: Scope) -> Optional[Pattern]:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            return None
+        for pattern in self._patterns:
+            if pattern.match(scope["path"]):
+                return pattern
+        return None
+
+    @staticmethod
+    def _key(scope: Scope) -> CoalescingKey:
+        authorization = b""
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                authorization = value
+                break
+        # Keep a digest rather than the bearer token itself
+        principal = hashlib.sha256(authorization).hexdigest()
+        return f'{scope["method"]} {scope["path"]}', scope.get("query_string", b""), principal
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        pattern = self._match(scope)
+        if pattern is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = self._key(scope)
+        flight = self._in_flight.get(key)
+        if flight is None:
+            if len(self._in_flight) >= self.max_keys:
+                requests_bypassed.inc()
+                await self.app(scope, receive, send)
+                return
+            flight = asyncio.get_running_loop().create_task(self._execute(dict(scope)))
+            self._in_flight[key] = flight
+            flight.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            requests_coalesced.inc(route=pattern.pattern)
+
+        # The shared execution runs in its own task, so one client
+        # disconnecting doesn't cancel the response the others wait for.
+        captured = await asyncio.shield(flight)
+        # Each waiter gets its own header list, so outer middleware editing
+        # it in place can't leak into the other waiters' responses
+        await send({**captured.start, "headers": list(captured.start["headers"])})
+        await send({"type": "http.response.body", "body": b"".join(captured.body), "more_body": False})
+
+    def _forget(self, key: CoalescingKey, flight: asyncio.Task) -> None:
+        if self._in_flight.get(key) is flight:
+            del self._in_flight[key]
+        if not flight.cancelled():
+            # Mark the exception as retrieved even if every waiter went away
+            flight.exception()
+
+    async def _execute(self, scope: Scope) -> _CapturedResponse:
+        request_sent = False
+        captured: Optional[_CapturedResponse] = None
+
+        async def receive() -> Message:
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # No client behind the shared execution; it never disconnects
+            await asyncio.Future()
+
+        async def send(message: Message) -> None:
+            nonlocal captured
+            if message["type"] == "http.response.start":
+                captured = _CapturedResponse(start=message)
+            elif message["type"] == "http.response.body":
+                captured.body.append(message.get("body", b""))
+
+        await self.app(scope, receive, send)
+        if captured is None:
+            raise RuntimeError("Application returned without sending a response")
+        return captured
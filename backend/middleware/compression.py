@@ -0,0 +1,289 @@
+import time
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.metrics import metrics
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+bytes_in = metrics.counter(
+    "compression_bytes_in_total",
+    "Response bytes before compression",
+    label_names=["encoding"]
+)
+bytes_out = metrics.counter(
+    "compression_bytes_out_total",
+    "Response bytes after compression",
+    label_names=["encoding"]
+)
+compression_seconds = metrics.histogram(
+    "compression_duration_seconds",
+    "CPU time spent compressing one response",
+    label_names=["encoding"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1)
+)
+compression_level = metrics.gauge(
+    "compression_level",
+    "Compression level chosen for the most recent response",
+    label_names=["encoding"]
+)
+
+# Levels used at low, medium and high CPU load
+LEVELS: Dict[str, Tuple[int, int, int]] = {
+    "zstd": (6, 3, 1),
+    "br": (5, 4, 1),
+    "gzip": (6, 4, 1),
+}
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+class _Encoder:
+    """Incremental compressor for one response"""
+
+    def __init__(self, compress: Callable[[bytes], bytes], flush: Callable[[], bytes], finish: Callable[[], bytes]):
+        self._compress = compress
+        self._flush = flush
+        self._finish = finish
+
+    def chunk(self, data: bytes) -> bytes:
+        """Compress a chunk and flush it so the client can decode it right away"""
+        return self._compress(data) + self._flush()
+
+    def last(self, data: bytes) -> bytes:
+        return self._compress(data) + self._finish()
+
+
+def _gzip_encoder(level: int) -> _Encoder:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return _Encoder(
+        compressor.compress,
+        lambda: compressor.flush(zlib.Z_SYNC_FLUSH),
+        compressor.flush
+    )
+
+
+def _brotli_encoder(level: int) -> _Encoder:
+    compressor = brotli.Compressor(quality=level)
+    return _Encoder(compressor.process, compressor.flush, compressor.finish)
+
+
+def _zstd_encoder(level: int) -> _Encoder:
+    compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    return _Encoder(
+        compressor.compress,
+        lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+        compressor.flush
+    )
+
+
+ENCODERS: Dict[str, Callable[[int], _Encoder]] = {"gzip": _gzip_encoder}
+if brotli is not None:
+    ENCODERS["br"] = _brotli_encoder
+if zstandard is not None:
+    ENCODERS["zstd"] = _zstd_encoder
+
+# Server preference when the client accepts several encodings equally
+PREFERENCE = ("zstd", "br", "gzip")
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the best supported encoding from an Accept-Encoding header"""
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[token] = weight
+
+    best: Optional[str] = None
+    best_weight = 0.0
+    for encoding in PREFERENCE:
+        if encoding not in ENCODERS:
+            continue
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+class CpuLoad:
+    """Utilisation of this process's CPU time, sampled at most once per interval"""
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self.value = 0.0
+        self._last_wall = time.monotonic()
+        self._last_cpu = time.process_time()
+
+    def current(self) -> float:
+        now = time.monotonic()
+        elapsed = now - self._last_wall
+        if elapsed >= self.interval:
+            cpu = time.process_time()
+            self.value = min(1.0, (cpu - self._last_cpu) / elapsed)
+            self._last_wall, self._last_cpu = now, cpu
+        return self.value
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing responses with zstd, brotli or gzip.
+
+    The encoding is negotiated from Accept-Encoding; zstd and brotli are
+    offered only when their packages are installed. Bodies are buffered
+    only until minimum_size bytes have arrived: responses that end before
+    that are sent as is, longer ones are compressed chunk by chunk and
+    flushed as they go, so streaming responses stay streaming. The level
+    drops as this worker's CPU utilisation rises.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.cpu_load = CpuLoad()
+
+    def choose_level(self, encoding: str) -> int:
+        low, medium, high = LEVELS[encoding]
+        load = self.cpu_load.current()
+        if load < 0.5:
+            return low
+        if load < 0.8:
+            return medium
+        return high
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.downstream = send
+        self.start_message: Optional[Message] = None
+        self.pending: List[bytes] = []
+        self.pending_size = 0
+        self.encoder: Optional[_Encoder] = None
+        self.passthrough = False
+        self.compress_time = 0.0
+        self.raw_size = 0
+        self.compressed_size = 0
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            self.passthrough = not self._compressible(Headers(raw=message["headers"]), message["status"])
+            if self.passthrough:
+                await self.downstream(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is None:
+            self.pending.append(body)
+            self.pending_size += len(body)
+            if self.pending_size < self.middleware.minimum_size:
+                if more_body:
+                    return
+                # Ended below the threshold: not worth compressing
+                self.passthrough = True
+                await self.downstream(self.start_message)
+                await self.downstream({"type": "http.response.body", "body": b"".join(self.pending)})
+                return
+            body = b"".join(self.pending)
+            self.pending = []
+            await self._start_compressed(body, more_body)
+            return
+
+        await self._send_compressed(body, more_body)
+
+    def _compressible(self, headers: Headers, status: int) -> bool:
+        if status < 200 or status in (204, 304):
+            return False
+        if "content-encoding" in headers or "no-transform" in headers.get("cache-control", ""):
+            return False
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return (
+            content_type.startswith("text/")
+            or content_type in COMPRESSIBLE_TYPES
+            or content_type.endswith("+json")
+        )
+
+    async def _start_compressed(self, body: bytes, more_body: bool) -> None:
+        level = self.middleware.choose_level(self.encoding)
+        compression_level.set(level, encoding=self.encoding)
+        self.encoder = ENCODERS[self.encoding](level)
+
+        data = self._compress(body, more_body)
+        # Edit a copy: the start message may be shared, e.g. replayed by coalescing
+        self.start_message = dict(self.start_message)
+        headers = MutableHeaders(scope=self.start_message)
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if more_body:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(len(data))
+        await self.downstream(self.start_message)
+        await self.downstream({"type": "http.response.body", "body": data, "more_body": more_body})
+        if not more_body:
+            self._record()
+
+    async def _send_compressed(self, body: bytes, more_body: bool) -> None:
+        data = self._compress(body, more_body)
+        await self.downstream({"type": "http.response.body", "body": data, "more_body": more_body})
+        if not more_body:
+            self._record()
+
+    def _compress(self, body: bytes, more_body: bool) -> bytes:
+        started = time.process_time()
+        data = self.encoder.chunk(body) if more_body else self.encoder.last(body)
+        self.compress_time += time.process_time() - started
+        self.raw_size += len(body)
+        self.compressed_size += len(data)
+        return data
+
+    def _record(self) -> None:
+        bytes_in.inc(self.raw_size, encoding=self.encoding)
+        bytes_out.inc(self.compressed_size, encoding=self.encoding)
+        compression_seconds.observe(self.compress_time, encoding=self.encoding)
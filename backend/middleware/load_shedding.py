@@ -0,0 +1,166 @@
+import asyncio
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List, Optional, Pattern, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from core.metrics import metrics
+
+queue_wait = metrics.histogram(
+    "load_shedding_queue_wait_seconds",
+    "Time admitted requests waited for a concurrency slot",
+    label_names=["budget"]
+)
+requests_shed = metrics.counter(
+    "load_shedding_requests_shed_total",
+    "Requests rejected with 503 before reaching the application",
+    label_names=["budget", "reason"]
+)
+requests_in_flight = metrics.gauge(
+    "load_shedding_requests_in_flight",
+    "Requests currently holding a concurrency slot",
+    label_names=["budget"]
+)
+requests_queued = metrics.gauge(
+    "load_shedding_requests_queued",
+    "Requests currently waiting for a concurrency slot",
+    label_names=["budget"]
+)
+
+
+@dataclass
+class RouteBudget:
+    """Concurrency budget for the requests whose path matches a pattern"""
+    name: str
+    pattern: str
+    max_concurrency: int
+    queue_timeout: float
+    max_queue: int = 100
+
+
+class _Limiter:
+    """
+    FIFO concurrency limiter with bounded queueing.
+
+    A released slot is handed directly to the oldest waiter. The limiter
+    also keeps a moving average of how long slots are held, to reject
+    requests up front when the queue ahead of them can't drain in time.
+    """
+
+    def __init__(self, budget: RouteBudget):
+        self.budget = budget
+        self.active = 0
+        self.service_time = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _expected_wait(self) -> float:
+        return (len(self._waiters) + 1) / self.budget.max_concurrency * self.service_time
+
+    async def acquire(self) -> Tuple[bool, Optional[str]]:
+        """
+        Wait for a slot until the budget's queue deadline.
+
+        Returns:
+            (admitted, reason) where reason says why a request was shed
+        """
+        if self.active < self.budget.max_concurrency and not self._waiters:
+            self.active += 1
+            return True, None
+        if len(self._waiters) >= self.budget.max_queue:
+            return False, "queue_full"
+        if self._expected_wait() > self.budget.queue_timeout:
+            return False, "predicted_timeout"
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.budget.queue_timeout)
+            return True, None
+        except asyncio.TimeoutError:
+            return False, "deadline"
+        except asyncio.CancelledError:
+            # Client went away; pass on a slot that was handed over meanwhile
+            if waiter.done() and not waiter.cancelled():
+                self.release(None)
+            raise
+        finally:
+            if not waiter.done() or waiter.cancelled():
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+
+    def release(self, held_for: Optional[float]) -> None:
+        if held_for is not None:
+            self.service_time = held_for if self.service_time == 0 else 0.9 * self.service_time + 0.1 * held_for
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+class LoadSheddingMiddleware:
+    """
+    ASGI middleware bounding in-flight requests per route budget.
+
+    Requests matching a budget's pattern (first match wins) must get one
+    of its slots within the budget's queue timeout, or they are rejected
+    immediately with 503 and Retry-After instead of piling up in front of
+    the database pool. Paths matching no budget are not limited.
+    """
+
+    def __init__(self, app: ASGIApp, budgets: List[RouteBudget], retry_after: int = 1):
+        self.app = app
+        self.retry_after = retry_after
+        self._routes: List[Tuple[Pattern, _Limiter]] = []
+        for budget in budgets:
+            limiter = _Limiter(budget)
+            self._routes.append((re.compile(budget.pattern), limiter))
+            requests_in_flight.set_function(lambda limiter=limiter: limiter.active, budget=budget.name)
+            requests_queued.set_function(lambda limiter=limiter: limiter.queued, budget=budget.name)
+
+    def _match(self, path: str) -> Optional[_Limiter]:
+        for pattern, limiter in self._routes:
+            if pattern.match(path):
+                return limiter
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self._match(scope["path"])
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        budget = limiter.budget.name
+        started = time.perf_counter()
+        admitted, reason = await limiter.acquire()
+        if not admitted:
+            requests_shed.inc(budget=budget, reason=reason)
+            response = JSONResponse(
+                {"detail": "Server is overloaded, retry later"},
+                status_code=503,
+                headers={"Retry-After": str(self.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        admitted_at = time.perf_counter()
+        queue_wait.observe(admitted_at - started, budget=budget)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.perf_counter() - admitted_at)
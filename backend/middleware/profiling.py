@@ -0,0 +1,79 @@
+import random
+import time
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.profiling import (
+    ProfileStore,
+    RequestProfile,
+    StackSampler,
+    verify_profile_token,
+)
+
+PROFILE_HEADER = b"x-profile"
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware capturing a statistical profile of selected requests.
+
+    A request is profiled when it carries a valid signed X-Profile header
+    (see core.profiling.sign_profile_token), or otherwise with probability
+    sample_rate. Its profile is written to the store after the response
+    has been sent, labelled with the route template so requests to
+    different projects aggregate together. Other requests pay only for
+    the header lookup.
+    """
+
+    def __init__(self, app: ASGIApp, sampler: StackSampler, store: ProfileStore, sample_rate: float = 0.0):
+        self.app = app
+        self.sampler = sampler
+        self.store = store
+        self.sample_rate = sample_rate
+        sampler.add_root(ProfilingMiddleware.__call__.__code__)
+
+    def _trigger(self, scope: Scope) -> Optional[str]:
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                return "header" if verify_profile_token(value.decode("latin-1")) else None
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        trigger = self._trigger(scope) if scope["type"] == "http" else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(method=scope["method"], path=scope["path"], trigger=trigger)
+        token = self.sampler.begin(profile)
+        if token is None:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - started
+            self.sampler.end(token)
+            # FastAPI records the matched route in the scope during routing
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "<unmatched>"
+            try:
+                await run_in_threadpool(
+                    self.store.write, profile, route_path, status_code, duration, self.sampler.interval
+                )
+            except OSError as e:
+                print(f"Failed to write request profile: {e}")
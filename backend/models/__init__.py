@@ -1,5 +1,7 @@
 from .user import User
 from .project import Project
 from .agent_run import AgentRun
+from .revoked_token import RevokedToken
+from .idempotency_key import IdempotencyKey
 
-__all__ = ["User", "Project", "AgentRun"]
\ No newline at end of file
+__all__ = ["User", "Project", "AgentRun", "RevokedToken", "IdempotencyKey"]
\ No newline at end of file
@@ -1,6 +1,6 @@
 import uuid
 from database import Base
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -8,6 +8,10 @@ from sqlalchemy.orm import relationship
 
 class AgentRun(Base):
     __tablename__ = "agent_runs"
+    __table_args__ = (
+        # Serves "newest runs of a project" without sorting
+        Index("ix_agent_runs_project_id_created_at", "project_id", "created_at"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id"), nullable=False, index=True)
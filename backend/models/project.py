@@ -1,6 +1,6 @@
 import uuid
 from database import Base
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -16,6 +16,10 @@ class Project(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
+    # Denormalized agent run summary, maintained by services/run_counters.py
+    run_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_run_at = Column(DateTime(timezone=True), nullable=True)
+    
     # Relationships
     user = relationship("User", back_populates="projects")
     agent_runs = relationship("AgentRun", back_populates="project", cascade="all, delete-orphan")
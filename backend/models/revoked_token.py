@@ -0,0 +1,13 @@
+from database import Base
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+    
+    # Monotonic id doubles as the sync cursor for workers polling new revocations
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    jti = Column(String(64), unique=True, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,4 +1,7 @@
 from .auth import router as auth_router
 from .project import router as project_router
+from .agent_run import router as agent_run_router
+from .metrics import router as metrics_router
+from .admin import router as admin_router
 
-__all__ = ["auth_router", "project_router"]
\ No newline at end of file
+__all__ = ["auth_router", "project_router", "agent_run_router", "metrics_router", "admin_router"]
\ No newline at end of file
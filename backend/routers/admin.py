@@ -0,0 +1,50 @@
+import time
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, Query
+from starlette.concurrency import run_in_threadpool
+
+from models.user import User
+from schemas.profiling import HotFramesResponse, ProfileToken
+from core.profiling import profile_store, sign_profile_token
+from dependencies.auth import get_current_admin_user
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.post("/profiles/token", response_model=ProfileToken)
+async def create_profile_token(
+    ttl_minutes: int = Query(15, ge=1, le=24 * 60),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Create a signed X-Profile header value.
+    
+    Requests carrying it are profiled until it expires.
+    """
+    expires_at = int(time.time()) + ttl_minutes * 60
+    return ProfileToken(
+        header="X-Profile",
+        value=sign_profile_token(expires_at),
+        expires_at=datetime.fromtimestamp(expires_at, tz=timezone.utc)
+    )
+
+
+@router.get("/profiles/hot-frames", response_model=HotFramesResponse)
+async def get_hot_frames(
+    window_minutes: int = Query(60, ge=1, le=7 * 24 * 60),
+    top: int = Query(20, ge=1, le=200),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Aggregate recent request profiles into the hottest frames per route.
+    
+    - **window_minutes**: Only include requests from this many minutes back
+    - **top**: Number of frames to return per route
+    
+    Frames are ranked by self samples, i.e. samples where the frame was
+    the one executing, then by total samples including its callees.
+    """
+    since = time.time() - window_minutes * 60
+    routes = await run_in_threadpool(profile_store.hot_frames, since, top)
+    return HotFramesResponse(window_minutes=window_minutes, routes=routes)
@@ -0,0 +1,72 @@
+from fastapi import APIRouter, Depends, Header, Response, status
+from sqlalchemy.orm import Session
+from typing import List, Optional, Union
+from uuid import UUID
+
+from core.config import settings
+from database import get_db, release_connection
+from models.user import User
+from schemas.agent_run import AgentRunCreate, AgentRunIngestResponse, IngestDurability
+from services.project_service import ProjectService
+from services.run_ingestion import run_ingestion_buffer
+from services.idempotency_service import IdempotencyService, hash_request
+from dependencies.auth import get_current_active_user
+from exceptions.exceptions import IngestionBatchTooLargeException
+
+router = APIRouter(prefix="/projects", tags=["agent runs"])
+
+
+@router.post("/{project_id}/runs", response_model=AgentRunIngestResponse, status_code=status.HTTP_201_CREATED)
+async def ingest_agent_runs(
+    project_id: UUID,
+    runs: Union[List[AgentRunCreate], AgentRunCreate],
+    response: Response,
+    durability: Optional[IngestDurability] = None,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Record one or more agent runs for a project.
+    
+    Accepts a single run object or a list of runs. Runs are buffered and
+    written in batches.
+    
+    - **durability**: `flush` waits until the runs are written (201),
+      `enqueue` returns as soon as they are buffered (202)
+    - **Idempotency-Key** header: Retries with the same key replay the
+      original response instead of recording the runs again
+    
+    Returns the IDs assigned to the runs.
+    """
+    batch = runs if isinstance(runs, list) else [runs]
+    # Retrying can't help a batch larger than the whole buffer
+    if len(batch) > settings.INGEST_BUFFER_MAX_SIZE:
+        raise IngestionBatchTooLargeException(settings.INGEST_BUFFER_MAX_SIZE)
+    durability = durability or IngestDurability(settings.INGEST_DURABILITY)
+
+    async def handler():
+        ProjectService(db).get_project_by_id(project_id, current_user)
+        # Don't hold a connection while waiting for the flush
+        release_connection(db)
+        run_ids, flushed = run_ingestion_buffer.enqueue(project_id, batch, durability)
+        # The runs are buffered now; only the response is left to wait for
+        return respond(run_ids, flushed)
+
+    async def respond(run_ids, flushed):
+        await run_ingestion_buffer.wait_flushed(flushed)
+        status_code = status.HTTP_201_CREATED
+        if durability is IngestDurability.ENQUEUE:
+            status_code = status.HTTP_202_ACCEPTED
+        return status_code, AgentRunIngestResponse(accepted=len(run_ids), run_ids=run_ids, durability=durability)
+
+    if idempotency_key is not None:
+        request_hash = hash_request(
+            "POST",
+            f"/projects/{project_id}/runs",
+            {"runs": [run.model_dump(mode="json") for run in batch], "durability": durability.value}
+        )
+        return await IdempotencyService(db).execute(idempotency_key, current_user, request_hash, handler)
+
+    response.status_code, result = await (await handler())
+    return result
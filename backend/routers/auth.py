@@ -2,11 +2,11 @@ from fastapi import APIRouter, Depends, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from typing import Dict
-from database import get_db
+from database import get_db, release_connection
 from models.user import User
 from schemas.auth import UserCreate, UserResponse, Token
 from services.auth_services import AuthService
-from dependencies.auth import get_current_active_user
+from dependencies.auth import get_current_active_user, get_token_payload
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
@@ -25,6 +25,7 @@ async def register(
     """
     auth_service = AuthService(db)
     user = auth_service.register_user(user_data)
+    release_connection(db)
     return auth_service.create_access_token_for_user(user)
 
 
@@ -48,11 +49,16 @@ async def login(
 
 @router.post("/logout")
 async def logout(
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_user),
+    payload: dict = Depends(get_token_payload),
+    db: Session = Depends(get_db)
 ) -> Dict[str, str]:
     """
     Logout the current user.
+    
+    Revokes the access token used for this request.
     """
+    AuthService(db).revoke_token(payload)
     return {"message": "Successfully logged out"}
 
 
@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from core.metrics import metrics
+
+router = APIRouter(tags=["monitoring"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Expose process metrics in Prometheus text format."""
+    return metrics.render()
@@ -1,12 +1,21 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Header, Query, status
 from sqlalchemy.orm import Session
-from typing import Dict
+from typing import Dict, List, Optional
 from uuid import UUID
 
-from database import get_db
+from database import get_db, release_connection
 from models.user import User
-from schemas.project import ProjectCreate, ProjectUpdate, ProjectResponse, ProjectListResponse
+from schemas.agent_run import AgentRunSummary
+from schemas.project import (
+    ProjectCreate,
+    ProjectUpdate,
+    ProjectResponse,
+    ProjectDetailResponse,
+    ProjectInclude,
+    ProjectListResponse
+)
 from services.project_service import ProjectService
+from services.idempotency_service import IdempotencyService, hash_request
 from dependencies.auth import get_current_active_user
 
 router = APIRouter(prefix="/projects", tags=["projects"])
@@ -15,6 +24,7 @@ router = APIRouter(prefix="/projects", tags=["projects"])
 @router.post("", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
 async def create_project(
     project_data: ProjectCreate,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -23,11 +33,24 @@ async def create_project(
     
     - **name**: Project name (required, max 255 characters)
     - **description**: Project description (optional)
+    - **Idempotency-Key** header: Retries with the same key replay the
+      original response instead of creating another project
     
     Returns the created project.
     """
     project_service = ProjectService(db)
-    return project_service.create_project(project_data, current_user)
+    if idempotency_key is None:
+        project = project_service.create_project(project_data, current_user)
+        release_connection(db)
+        return project
+    
+    async def handler():
+        # Committed together with the stored response
+        project = project_service.add_project(project_data, current_user)
+        return status.HTTP_201_CREATED, ProjectResponse.model_validate(project)
+    
+    request_hash = hash_request("POST", "/projects", project_data.model_dump(mode="json"))
+    return await IdempotencyService(db).execute(idempotency_key, current_user, request_hash, handler)
 
 
 @router.get("", response_model=ProjectListResponse)
@@ -42,22 +65,37 @@ async def list_projects(
     """
     project_service = ProjectService(db)
     projects = project_service.get_user_projects(current_user)
+    release_connection(db)
     return ProjectListResponse(projects=projects, total=len(projects))
 
 
-@router.get("/{project_id}", response_model=ProjectResponse)
+@router.get("/{project_id}", response_model=ProjectDetailResponse)
 async def get_project(
     project_id: UUID,
+    include: List[ProjectInclude] = Query([]),
+    runs_limit: int = Query(10, ge=1, le=100),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
     Get a specific project by ID.
     
+    - **include**: `recent_runs` to embed the newest runs (without input/output)
+    - **runs_limit**: Number of recent runs to embed (1-100, default 10)
+    
     Returns the project if it belongs to the current user.
     """
     project_service = ProjectService(db)
-    return project_service.get_project_by_id(project_id, current_user)
+    if ProjectInclude.RECENT_RUNS not in include:
+        project = project_service.get_project_by_id(project_id, current_user)
+        release_connection(db)
+        return project
+    
+    project, recent_runs = project_service.get_project_with_recent_runs(project_id, current_user, runs_limit)
+    release_connection(db)
+    detail = ProjectDetailResponse.model_validate(project)
+    detail.recent_runs = [AgentRunSummary.model_validate(run) for run in recent_runs]
+    return detail
 
 
 @router.put("/{project_id}", response_model=ProjectResponse)
@@ -76,7 +114,9 @@ async def update_project(
     Returns the updated project.
     """
     project_service = ProjectService(db)
-    return project_service.update_project(project_id, project_data, current_user)
+    project = project_service.update_project(project_id, project_data, current_user)
+    release_connection(db)
+    return project
 
 
 @router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,43 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from enum import Enum
+from datetime import datetime
+from uuid import UUID
+
+
+class IngestDurability(str, Enum):
+    """When an ingestion request is acknowledged"""
+    FLUSH = "flush"
+    ENQUEUE = "enqueue"
+
+
+class AgentRunCreate(BaseModel):
+    input: Optional[str] = None
+    output: Optional[str] = None
+    version: Optional[str] = Field(None, max_length=50)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "input": "Design a caching layer for the projects API",
+                "output": "Use a read-through cache keyed by project id...",
+                "version": "v1"
+            }
+        }
+
+
+class AgentRunIngestResponse(BaseModel):
+    accepted: int
+    run_ids: List[UUID]
+    durability: IngestDurability
+
+
+class AgentRunSummary(BaseModel):
+    """Agent run without its input/output bodies"""
+    id: UUID
+    version: Optional[str]
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
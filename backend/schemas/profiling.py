@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from typing import List
+from datetime import datetime
+
+
+class ProfileToken(BaseModel):
+    header: str
+    value: str
+    expires_at: datetime
+
+
+class HotFrame(BaseModel):
+    frame: str
+    self_samples: int
+    total_samples: int
+    self_percent: float
+    total_percent: float
+
+
+class RouteHotFrames(BaseModel):
+    route: str
+    profiles: int
+    samples: int
+    frames: List[HotFrame]
+
+
+class HotFramesResponse(BaseModel):
+    window_minutes: int
+    routes: List[RouteHotFrames]
@@ -1,7 +1,14 @@
 from pydantic import BaseModel, Field
 from typing import Optional, List
+from enum import Enum
 from datetime import datetime
 from uuid import UUID
+from schemas.agent_run import AgentRunSummary
+
+
+class ProjectInclude(str, Enum):
+    """Related data that can be embedded in a project detail response"""
+    RECENT_RUNS = "recent_runs"
 
 
 class ProjectCreate(BaseModel):
@@ -37,11 +44,17 @@ class ProjectResponse(BaseModel):
     description: Optional[str]
     created_at: datetime
     updated_at: datetime
+    run_count: int = 0
+    last_run_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
 
 
+class ProjectDetailResponse(ProjectResponse):
+    recent_runs: Optional[List[AgentRunSummary]] = None
+
+
 class ProjectListResponse(BaseModel):
     projects: List[ProjectResponse]
     total: int
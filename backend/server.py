@@ -0,0 +1,185 @@
+"""
+Production launcher for the API.
+
+Runs the app under gunicorn with uvicorn workers, one per available CPU
+unless WEB_CONCURRENCY is set. DB_CONNECTION_BUDGET is the total number of
+Postgres connections all workers together may open; it is split evenly
+into each worker's pool_size/max_overflow, and startup is refused if the
+budget does not fit the server's max_connections.
+
+Usage:
+    python server.py
+
+Signals (sent to the gunicorn master):
+    TERM  drain in-flight requests for up to GRACEFUL_TIMEOUT_SECONDS, then exit
+    HUP   start fresh workers and gracefully stop the old ones. With
+          PRELOAD_APP the code stays loaded in the master, so deploying new
+          code needs USR2 (start a new master) followed by TERM to the old one.
+"""
+import math
+import os
+import sys
+from typing import Optional, Tuple
+
+from gunicorn.app.base import BaseApplication
+
+from core.config import settings
+
+CGROUP_V2_CPU_MAX = "/sys/fs/cgroup/cpu.max"
+CGROUP_V1_CPU_QUOTA = "/sys/fs/cgroup/cpu/cpu.cfs_quota_us"
+CGROUP_V1_CPU_PERIOD = "/sys/fs/cgroup/cpu/cpu.cfs_period_us"
+
+# Each worker keeps one extra connection outside its pool for the health monitor
+HEALTH_MONITOR_CONNECTIONS = 1
+
+
+def _read_cgroup_cpu_limit() -> Optional[float]:
+    """CPU limit imposed by the container runtime, if any"""
+    try:
+        with open(CGROUP_V2_CPU_MAX) as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        with open(CGROUP_V1_CPU_QUOTA) as f:
+            quota = int(f.read())
+        with open(CGROUP_V1_CPU_PERIOD) as f:
+            period = int(f.read())
+        if quota > 0 and period > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def available_cpus() -> int:
+    """Number of CPUs this process may actually use"""
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    limit = _read_cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, max(1, math.ceil(limit)))
+    return max(1, cpus)
+
+
+def plan_workers() -> int:
+    """Worker count: WEB_CONCURRENCY if set, otherwise one per available CPU"""
+    if settings.WEB_CONCURRENCY > 0:
+        return settings.WEB_CONCURRENCY
+    return available_cpus()
+
+
+def plan_pool(workers: int, budget: int) -> Tuple[int, int]:
+    """
+    Split the global connection budget into per-worker pool limits.
+
+    Returns:
+        (pool_size, max_overflow) for each worker
+    """
+    per_worker = budget // workers - HEALTH_MONITOR_CONNECTIONS
+    if per_worker < 1:
+        raise SystemExit(
+            f"DB_CONNECTION_BUDGET={budget} cannot give {workers} workers "
+            f"at least one connection each; raise the budget or lower WEB_CONCURRENCY"
+        )
+    pool_size = max(1, per_worker // 2)
+    return pool_size, per_worker - pool_size
+
+
+def check_server_connection_limit(database_url: str, required: int) -> None:
+    """Refuse to start if the workers could open more connections than Postgres allows"""
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.pool import NullPool
+
+    probe = create_engine(database_url, poolclass=NullPool)
+    try:
+        with probe.connect() as connection:
+            max_connections = int(connection.execute(text("SHOW max_connections")).scalar())
+            reserved = int(connection.execute(text("SHOW superuser_reserved_connections")).scalar())
+    except Exception as e:
+        print(f"Could not check Postgres connection limit: {e}")
+        return
+    finally:
+        probe.dispose()
+
+    available = max_connections - reserved
+    if required > available:
+        raise SystemExit(
+            f"Workers may open up to {required} connections but Postgres allows "
+            f"{available} ({max_connections} max_connections - {reserved} reserved); "
+            f"lower DB_CONNECTION_BUDGET"
+        )
+
+
+def when_ready(server) -> None:
+    """Close the master's database connections before any worker is forked"""
+    from database import engine
+
+    # With PRELOAD_APP, importing the app in the master opened a connection
+    # for create_all; the master serves no requests, so it needs none.
+    engine.dispose()
+
+
+def post_fork(server, worker) -> None:
+    """Drop database connections inherited from the master after forking"""
+    from database import engine
+
+    engine.dispose(close=False)
+
+
+class Server(BaseApplication):
+    """Gunicorn application running main:app with uvicorn workers"""
+
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from main import app
+
+        return app
+
+
+def main() -> None:
+    workers = plan_workers()
+    pool_size, max_overflow = plan_pool(workers, settings.DB_CONNECTION_BUDGET)
+
+    # database.py reads these at import, so they must be set before the app loads
+    os.environ["DB_POOL_SIZE"] = str(pool_size)
+    os.environ["DB_MAX_OVERFLOW"] = str(max_overflow)
+
+    from database import DATABASE_URL
+    from core.security import configure_password_context
+
+    required = workers * (pool_size + max_overflow + HEALTH_MONITOR_CONNECTIONS)
+    check_server_connection_limit(DATABASE_URL, required)
+
+    # Calibrate once on an idle machine; forked workers inherit the result
+    configure_password_context()
+
+    print(
+        f"Starting {workers} workers, DB pool {pool_size}+{max_overflow} per worker "
+        f"({required} of {settings.DB_CONNECTION_BUDGET} budgeted connections)"
+    )
+    Server({
+        "bind": f"{settings.HOST}:{settings.PORT}",
+        "workers": workers,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": settings.PRELOAD_APP,
+        "graceful_timeout": settings.GRACEFUL_TIMEOUT_SECONDS,
+        "when_ready": when_ready,
+        "post_fork": post_fork,
+    }).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,15 @@
+from sqlalchemy import bindparam, select
 from sqlalchemy.orm import Session
 from datetime import timedelta
 from typing import Optional
 from uuid import UUID
 from models.user import User
 from schemas.auth import UserCreate, Token
-from core.security import verify_password, create_access_token, hash_password
+from core.security import verify_password, create_access_token, hash_password, password_needs_rehash
 from core.config import settings
+from database import release_connection
+from core.revocation import token_revocation_store
+from services.password_rehash import password_rehasher
 from exceptions.exceptions import (
     UsernameAlreadyTakenException,
     InvalidCredentialsException,
@@ -13,6 +17,10 @@ from exceptions.exceptions import (
     UserNotFoundException
 )
 
+# Built once: SQLAlchemy reuses the compiled SQL of a statement object
+# across calls instead of rebuilding and recompiling a query each time
+USER_BY_USERNAME = select(User).where(User.username == bindparam("username"))
+
 
 class AuthService:
     """Service layer for authentication business logic"""
@@ -37,7 +45,8 @@ class AuthService:
         if self._user_exists_by_username(user_data.username):
             raise UsernameAlreadyTakenException()
         
-        # Create new user
+        # Create new user, without holding a connection while hashing
+        release_connection(self.db)
         hashed_password = hash_password(user_data.password)
         new_user = User(
             username=user_data.username,
@@ -54,6 +63,9 @@ class AuthService:
         """
         Authenticate a user with username/email and password.
         
+        A stored hash weaker than the current policy is upgraded in the
+        background once the password has been verified.
+        
         Args:
             username: Username or email
             password: Plain text password
@@ -67,6 +79,7 @@ class AuthService:
         """
         # Try to find user by username first, then by email
         user = self._get_user_by_username(username)
+        release_connection(self.db)
         
         if not user or not verify_password(password, user.password):
             raise InvalidCredentialsException()
@@ -74,6 +87,9 @@ class AuthService:
         if not user.is_active:
             raise InactiveUserException()
         
+        if password_needs_rehash(user.password):
+            password_rehasher.submit(user.id, user.password, password)
+        
         return user
     
     def create_access_token_for_user(self, user: User) -> Token:
@@ -94,6 +110,19 @@ class AuthService:
         
         return Token(access_token=access_token, token_type="bearer")
     
+    def revoke_token(self, payload: dict) -> None:
+        """
+        Revoke an access token until it expires.
+        
+        Args:
+            payload: Verified claims of the token to revoke
+        """
+        jti = payload.get("jti")
+        if jti is None:
+            # Tokens issued before revocation support carry no id
+            return
+        token_revocation_store.revoke(jti, payload["exp"])
+    
     def get_user_by_username(self, username: str) -> Optional[User]:
         """
         Get a user by username.
@@ -126,8 +155,8 @@ class AuthService:
     
     def _user_exists_by_username(self, username: str) -> bool:
         """Check if a user with the given username exists"""
-        return self.db.query(User).filter(User.username == username).first() is not None
+        return self._get_user_by_username(username) is not None
     
     def _get_user_by_username(self, username: str) -> Optional[User]:
         """Get user by username"""
-        return self.db.query(User).filter(User.username == username).first()
\ No newline at end of file
+        return self.db.execute(USER_BY_USERNAME, {"username": username}).scalar_one_or_none()
\ No newline at end of file
@@ -0,0 +1,263 @@
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Optional, Tuple, Union
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+
+from core.config import settings
+from core.metrics import metrics
+from core.tasks import PeriodicTask
+from database import engine
+from models.idempotency_key import IdempotencyKey
+from models.user import User
+from services.base import BaseService
+from exceptions.exceptions import IdempotencyKeyMismatchException, IdempotencyKeyInProgressException
+
+idempotent_requests = metrics.counter(
+    "idempotent_requests_total",
+    "Requests carrying an Idempotency-Key, by outcome",
+    label_names=["outcome"]
+)
+
+IdempotentResponse = Tuple[int, BaseModel]
+
+# A handler does the request's work up to the point where it takes effect.
+# Database changes are left uncommitted in the service's session and
+# committed together with the stored response; the handler then returns
+# the response itself. Work that takes effect outside the session, like
+# enqueued agent runs, is applied before returning an awaitable for the
+# response, which must fail only if that work was undone.
+IdempotentHandler = Callable[[], Awaitable[Union[IdempotentResponse, Awaitable[IdempotentResponse]]]]
+
+
+def hash_request(method: str, path: str, body: Any) -> str:
+    """Fingerprint a request so a key can't be replayed for a different one"""
+    canonical = json.dumps([method, path, body], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class IdempotencyService(BaseService):
+    """Service layer for replaying responses of retried non-idempotent requests"""
+
+    async def execute(
+        self,
+        key: str,
+        user: User,
+        request_hash: str,
+        handler: IdempotentHandler
+    ) -> JSONResponse:
+        """
+        Run a request at most once per idempotency key.
+
+        The first request with a key claims it, runs the handler and stores
+        the response. Later requests with the same key replay the stored
+        response; concurrent ones wait for the first to finish. The claim
+        is given up, so the key can be retried, only if the handler fails
+        before its work took effect.
+
+        Args:
+            key: Client-supplied Idempotency-Key header
+            user: The user making the request
+            request_hash: Fingerprint of the request, see hash_request
+            handler: Does the work and produces the status code and response model,
+                see IdempotentHandler
+
+        Returns:
+            The original or replayed response
+
+        Raises:
+            IdempotencyKeyMismatchException: If the key was used for a different request
+            IdempotencyKeyInProgressException: If the first request didn't finish in time
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.IDEMPOTENCY_WAIT_TIMEOUT_SECONDS
+        delay = 0.05
+
+        while True:
+            claimed, record = self._claim(key, user, request_hash)
+            if claimed:
+                idempotent_requests.inc(outcome="executed")
+                return await self._run_claimed(record, handler)
+
+            if record is None:
+                # The holder failed and released the key meanwhile; claim it again
+                continue
+
+            if record.request_hash != request_hash:
+                idempotent_requests.inc(outcome="mismatch")
+                raise IdempotencyKeyMismatchException()
+
+            if record.response_status is not None:
+                idempotent_requests.inc(outcome="replayed")
+                return JSONResponse(
+                    content=json.loads(record.response_body),
+                    status_code=record.response_status,
+                    headers={"Idempotent-Replayed": "true"}
+                )
+
+            # Release the connection while the first request finishes
+            self.db.rollback()
+            if loop.time() + delay > deadline:
+                idempotent_requests.inc(outcome="in_progress")
+                raise IdempotencyKeyInProgressException()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    def _claim(self, key: str, user: User, request_hash: str) -> Tuple[bool, Optional[IdempotencyKey]]:
+        """Claim the key, or return the existing record if another request holds it"""
+        now = datetime.now(timezone.utc)
+        stale_claim_before = now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT_SECONDS)
+
+        # Expired keys, and claims abandoned by a crashed request, are free
+        # again. A running request keeps refreshing created_at, see _complete.
+        self.db.execute(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.user_id == user.id,
+                IdempotencyKey.key == key,
+                or_(
+                    IdempotencyKey.expires_at <= now,
+                    and_(IdempotencyKey.response_status.is_(None), IdempotencyKey.created_at <= stale_claim_before)
+                )
+            )
+        )
+        claim = IdempotencyKey(
+            user_id=user.id,
+            key=key,
+            request_hash=request_hash,
+            created_at=now,
+            expires_at=now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+        )
+        self.db.add(claim)
+        try:
+            self.db.commit()
+            return True, claim
+        except IntegrityError:
+            self.db.rollback()
+
+        record = self.db.execute(
+            select(IdempotencyKey).where(IdempotencyKey.user_id == user.id, IdempotencyKey.key == key)
+        ).scalar_one_or_none()
+        return False, record
+
+    async def _run_claimed(self, claim: IdempotencyKey, handler: IdempotentHandler) -> JSONResponse:
+        claim_id = claim.id
+        try:
+            result = await handler()
+            if isinstance(result, tuple):
+                # Store the response in the transaction holding the handler's changes
+                status_code, model = result
+                content = model.model_dump(mode="json")
+                claim.response_status = status_code
+                claim.response_body = json.dumps(content)
+                self.db.commit()
+                return JSONResponse(content=content, status_code=status_code)
+            self.db.commit()
+        except BaseException:
+            # Nothing took effect: let the client retry with the same key,
+            # also when it disconnected and cancelled the request
+            self.db.rollback()
+            await run_in_threadpool(_release_claim, claim_id)
+            raise
+
+        # The work has taken effect, so finish and record it even if the
+        # client goes away meanwhile
+        completion = asyncio.ensure_future(_complete(claim_id, result))
+        completion.add_done_callback(_retrieve_exception)
+        status_code, content = await asyncio.shield(completion)
+        return JSONResponse(content=content, status_code=status_code)
+
+
+async def _complete(claim_id: int, response: Awaitable[IdempotentResponse]) -> Tuple[int, dict]:
+    """Wait for a handler's response and store it on its claim"""
+    response = asyncio.ensure_future(response)
+    try:
+        while True:
+            # Refresh the claim so a slow response isn't taken over as abandoned
+            done, _ = await asyncio.wait({response}, timeout=settings.IDEMPOTENCY_LOCK_TIMEOUT_SECONDS / 2)
+            if done:
+                break
+            await run_in_threadpool(_refresh_claim, claim_id)
+        status_code, model = response.result()
+    except Exception:
+        # The handler's work was undone, so the request may run again
+        await run_in_threadpool(_release_claim, claim_id)
+        raise
+
+    content = model.model_dump(mode="json")
+    try:
+        await run_in_threadpool(_store_response, claim_id, status_code, content)
+    except Exception as e:
+        # Keep the claim: running the request again would repeat its work
+        print(f"Failed to store response for idempotency key {claim_id}: {e}")
+    return status_code, content
+
+
+def _retrieve_exception(task: asyncio.Task) -> None:
+    # The client may be gone, leaving nobody to await a failure
+    if not task.cancelled():
+        task.exception()
+
+
+def _release_claim(claim_id: int) -> None:
+    with engine.begin() as connection:
+        connection.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.id == claim_id, IdempotencyKey.response_status.is_(None))
+        )
+
+
+def _refresh_claim(claim_id: int) -> None:
+    with engine.begin() as connection:
+        connection.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.id == claim_id, IdempotencyKey.response_status.is_(None))
+            .values(created_at=datetime.now(timezone.utc))
+        )
+
+
+def _store_response(claim_id: int, status_code: int, content: dict) -> None:
+    with engine.begin() as connection:
+        connection.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.id == claim_id)
+            .values(response_status=status_code, response_body=json.dumps(content))
+        )
+
+
+def sweep_expired_keys(batch_size: int) -> int:
+    """
+    Delete expired idempotency keys in batches.
+
+    Returns:
+        Number of keys deleted
+    """
+    deleted = 0
+    while True:
+        with engine.begin() as connection:
+            expired = (
+                select(IdempotencyKey.id)
+                .where(IdempotencyKey.expires_at <= datetime.now(timezone.utc))
+                .limit(batch_size)
+                .scalar_subquery()
+            )
+            result = connection.execute(delete(IdempotencyKey).where(IdempotencyKey.id.in_(expired)))
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
+
+
+async def _sweep_in_background() -> None:
+    await run_in_threadpool(sweep_expired_keys, settings.IDEMPOTENCY_SWEEP_BATCH_SIZE)
+
+
+# Periodically deletes expired idempotency keys
+idempotency_key_sweeper = PeriodicTask(
+    "Idempotency key sweep",
+    interval=settings.IDEMPOTENCY_SWEEP_INTERVAL_SECONDS,
+    callback=_sweep_in_background
+)
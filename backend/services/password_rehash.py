@@ -0,0 +1,71 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Set
+from uuid import UUID
+
+from sqlalchemy import update
+from starlette.concurrency import run_in_threadpool
+
+from core.metrics import metrics
+from core.security import hash_password
+from database import engine
+from models.user import User
+
+password_rehashes = metrics.counter(
+    "password_rehashes_total",
+    "Stored password hashes upgraded to the current policy after login, by outcome",
+    label_names=["outcome"]
+)
+
+
+class PasswordRehasher:
+    """
+    Upgrades outdated password hashes off the request path.
+
+    Hashing at the current cost takes as long as the login's own verify,
+    so it runs on a small dedicated pool instead of delaying the response.
+    The update only applies if the stored hash is still the one that was
+    verified, so a password change meanwhile is never overwritten.
+    """
+
+    def __init__(self, max_workers: int = 1):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-rehash")
+        self._lock = threading.Lock()
+        self._pending: Set[UUID] = set()
+
+    def submit(self, user_id: UUID, verified_hash: str, password: str) -> None:
+        """Schedule a rehash, unless one is already pending for the user"""
+        with self._lock:
+            if user_id in self._pending:
+                return
+            self._pending.add(user_id)
+        try:
+            self._executor.submit(self._rehash, user_id, verified_hash, password)
+        except RuntimeError:
+            # Shutting down; the next login tries again
+            with self._lock:
+                self._pending.discard(user_id)
+
+    def _rehash(self, user_id: UUID, verified_hash: str, password: str) -> None:
+        try:
+            new_hash = hash_password(password)
+            with engine.begin() as connection:
+                result = connection.execute(
+                    update(User)
+                    .where(User.id == user_id, User.password == verified_hash)
+                    .values(password=new_hash)
+                )
+            password_rehashes.inc(outcome="upgraded" if result.rowcount else "superseded")
+        except Exception as e:
+            password_rehashes.inc(outcome="failed")
+            print(f"Password rehash failed for user {user_id}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(user_id)
+
+    async def stop(self) -> None:
+        """Finish the rehash in progress and drop queued ones"""
+        await run_in_threadpool(self._executor.shutdown, wait=True, cancel_futures=True)
+
+
+password_rehasher = PasswordRehasher()
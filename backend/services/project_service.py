@@ -1,13 +1,24 @@
+from sqlalchemy import bindparam, select, true
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from uuid import UUID
 
+from models.agent_run import AgentRun
 from models.project import Project
 from models.user import User
 from schemas.project import ProjectCreate, ProjectUpdate
 from services.base import BaseService
 from exceptions.exceptions import ProjectNotFoundException, ProjectAccessDeniedException
 
+# Built once so the hot lookups reuse their compiled SQL
+PROJECT_BY_ID = select(Project).where(Project.id == bindparam("project_id"))
+PROJECTS_BY_USER = (
+    select(Project)
+    .where(Project.user_id == bindparam("user_id"))
+    .order_by(Project.created_at.desc())
+)
+
 
 class ProjectService(BaseService):
     """Service layer for project business logic"""
@@ -23,6 +34,23 @@ class ProjectService(BaseService):
         Returns:
             Created Project object
         """
+        new_project = self.add_project(project_data, user)
+        self.db.commit()
+        
+        return new_project
+    
+    def add_project(self, project_data: ProjectCreate, user: User) -> Project:
+        """
+        Insert a new project without committing, so the caller can commit
+        it together with other changes.
+        
+        Args:
+            project_data: Project creation data
+            user: The user creating the project
+            
+        Returns:
+            Inserted Project object
+        """
         new_project = Project(
             name=project_data.name,
             description=project_data.description,
@@ -30,7 +58,7 @@ class ProjectService(BaseService):
         )
         
         self.db.add(new_project)
-        self.db.commit()
+        self.db.flush()
         self.db.refresh(new_project)
         
         return new_project
@@ -45,7 +73,7 @@ class ProjectService(BaseService):
         Returns:
             List of Project objects
         """
-        return self.db.query(Project).filter(Project.user_id == user.id).order_by(Project.created_at.desc()).all()
+        return list(self.db.execute(PROJECTS_BY_USER, {"user_id": user.id}).scalars())
     
     def get_project_by_id(self, project_id: UUID, user: User) -> Project:
         """
@@ -62,7 +90,7 @@ class ProjectService(BaseService):
             ProjectNotFoundException: If project doesn't exist
             ProjectAccessDeniedException: If user doesn't own the project
         """
-        project = self.db.query(Project).filter(Project.id == project_id).first()
+        project = self.db.execute(PROJECT_BY_ID, {"project_id": project_id}).scalar_one_or_none()
         
         if not project:
             raise ProjectNotFoundException()
@@ -72,6 +100,54 @@ class ProjectService(BaseService):
         
         return project
     
+    def get_project_with_recent_runs(
+        self,
+        project_id: UUID,
+        user: User,
+        runs_limit: int
+    ) -> Tuple[Project, List[Row]]:
+        """
+        Get a project and its newest runs in a single query.
+        
+        Runs are fetched through a LATERAL subquery limited per project,
+        without their input/output bodies.
+        
+        Args:
+            project_id: The project ID
+            user: The user requesting the project
+            runs_limit: Maximum number of runs to return
+            
+        Returns:
+            Tuple of the Project and its newest run summaries, newest first
+            
+        Raises:
+            ProjectNotFoundException: If project doesn't exist
+            ProjectAccessDeniedException: If user doesn't own the project
+        """
+        recent_runs = (
+            select(AgentRun.id, AgentRun.version, AgentRun.created_at, AgentRun.updated_at)
+            .where(AgentRun.project_id == Project.id)
+            .order_by(AgentRun.created_at.desc())
+            .limit(runs_limit)
+            .lateral("recent_runs")
+        )
+        rows = self.db.execute(
+            select(Project, recent_runs)
+            .outerjoin(recent_runs, true())
+            .where(Project.id == project_id)
+            .order_by(recent_runs.c.created_at.desc())
+        ).all()
+        
+        if not rows:
+            raise ProjectNotFoundException()
+        
+        project = rows[0].Project
+        if project.user_id != user.id:
+            raise ProjectAccessDeniedException()
+        
+        runs = [row for row in rows if row.id is not None]
+        return project, runs
+    
     def update_project(self, project_id: UUID, project_data: ProjectUpdate, user: User) -> Project:
         """
         Update a project.
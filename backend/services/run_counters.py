@@ -0,0 +1,156 @@
+from collections import Counter
+from typing import Dict, List, Optional
+
+from sqlalchemy import bindparam, func, or_, select, text, update
+from sqlalchemy.engine import Connection
+from starlette.concurrency import run_in_threadpool
+
+from core.config import settings
+from core.metrics import metrics
+from core.tasks import PeriodicTask
+from database import engine
+from models.agent_run import AgentRun
+from models.project import Project
+
+# Arbitrary key so only one worker at a time runs the reconciliation
+RECONCILE_LOCK_KEY = 3_021_774_530
+# Arbitrary key held shared by flushes and exclusively by the reconciliation
+RUN_COUNTER_LOCK_KEY = 3_021_774_531
+
+projects_table = Project.__table__
+agent_runs_table = AgentRun.__table__
+
+counters_repaired = metrics.counter(
+    "project_run_counters_repaired_total",
+    "Projects whose run_count/last_run_at drifted and were repaired"
+)
+
+_increment_counters = (
+    update(projects_table)
+    .where(projects_table.c.id == bindparam("b_project_id"))
+    .values(
+        run_count=projects_table.c.run_count + bindparam("b_count"),
+        last_run_at=func.now(),
+        # Counter maintenance is not an edit of the project itself
+        updated_at=projects_table.c.updated_at
+    )
+)
+
+
+def lock_run_counters(connection: Connection, exclusive: bool = False) -> None:
+    """
+    Serialize counter updates with the reconciliation, until the transaction ends.
+
+    Flushes take the lock shared, so they don't wait for each other. The
+    reconciliation takes it exclusively: otherwise, under READ COMMITTED,
+    it could count agent_runs before a concurrent flush commits and then
+    overwrite that flush's increment with the lower count.
+
+    Args:
+        connection: Connection with a transaction open
+        exclusive: Whether to wait for all flushes in progress
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    function = "pg_advisory_xact_lock" if exclusive else "pg_advisory_xact_lock_shared"
+    connection.execute(text(f"SELECT {function}(:key)"), {"key": RUN_COUNTER_LOCK_KEY})
+
+
+def increment_run_counters(connection: Connection, rows: List[Dict]) -> None:
+    """
+    Bump run_count/last_run_at for the projects of newly inserted runs.
+
+    Must run in the same transaction as the insert, after
+    lock_run_counters. Runs get created_at = now(), which is constant
+    within a transaction, so last_run_at matches the newest inserted run.
+
+    Args:
+        connection: Connection with the insert's transaction open
+        rows: Inserted agent run rows
+    """
+    counts = Counter(row["project_id"] for row in rows)
+    # Fixed lock order so concurrent flushes from several workers can't deadlock
+    params = [
+        {"b_project_id": project_id, "b_count": count}
+        for project_id, count in sorted(counts.items(), key=lambda item: str(item[0]))
+    ]
+    connection.execute(_increment_counters, params)
+
+
+def reconcile_run_counters(connection: Connection) -> int:
+    """
+    Recompute run_count/last_run_at from agent_runs where they drifted.
+
+    Flushes wait until the transaction ends, so keep it short.
+
+    Args:
+        connection: Connection with a transaction open
+
+    Returns:
+        Number of projects repaired
+    """
+    lock_run_counters(connection, exclusive=True)
+    actual_count = (
+        select(func.count())
+        .where(agent_runs_table.c.project_id == projects_table.c.id)
+        .scalar_subquery()
+    )
+    actual_last_run_at = (
+        select(func.max(agent_runs_table.c.created_at))
+        .where(agent_runs_table.c.project_id == projects_table.c.id)
+        .scalar_subquery()
+    )
+    result = connection.execute(
+        update(projects_table)
+        .where(or_(
+            projects_table.c.run_count != actual_count,
+            projects_table.c.last_run_at.is_distinct_from(actual_last_run_at)
+        ))
+        .values(
+            run_count=actual_count,
+            last_run_at=actual_last_run_at,
+            updated_at=projects_table.c.updated_at
+        )
+    )
+    return result.rowcount
+
+
+def run_reconciliation() -> Optional[int]:
+    """
+    Reconcile all project counters in one transaction.
+
+    Returns:
+        Number of projects repaired, or None if another worker holds the lock
+    """
+    with engine.begin() as connection:
+        if engine.dialect.name == "postgresql":
+            acquired = connection.execute(
+                text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": RECONCILE_LOCK_KEY}
+            ).scalar()
+            if not acquired:
+                return None
+        repaired = reconcile_run_counters(connection)
+    counters_repaired.inc(repaired)
+    return repaired
+
+
+async def _reconcile_in_background() -> None:
+    repaired = await run_in_threadpool(run_reconciliation)
+    if repaired:
+        print(f"Repaired run counters of {repaired} projects")
+
+
+# Periodically repairs drifted project run counters
+run_counter_reconciler = PeriodicTask(
+    "Run counter reconciliation",
+    interval=settings.RUN_COUNTER_RECONCILE_INTERVAL_SECONDS,
+    callback=_reconcile_in_background
+)
+
+
+if __name__ == "__main__":
+    repaired = run_reconciliation()
+    if repaired is None:
+        print("Reconciliation already running in another process")
+    else:
+        print(f"Repaired run counters of {repaired} projects")
@@ -0,0 +1,302 @@
+import asyncio
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+
+from core.config import settings
+from core.metrics import metrics
+from database import engine
+from models.agent_run import AgentRun
+from schemas.agent_run import AgentRunCreate, IngestDurability
+from services.run_counters import increment_run_counters, lock_run_counters
+from exceptions.exceptions import (
+    IngestionBatchTooLargeException,
+    IngestionBufferFullException,
+    IngestionFailedException
+)
+
+buffer_depth = metrics.gauge(
+    "agent_run_ingest_buffer_depth",
+    "Agent runs waiting in the ingestion buffer"
+)
+flush_duration = metrics.histogram(
+    "agent_run_ingest_flush_duration_seconds",
+    "Time spent writing one batch of agent runs"
+)
+flush_batch_size = metrics.histogram(
+    "agent_run_ingest_flush_batch_size",
+    "Number of agent runs written per flush",
+    buckets=(1, 10, 50, 100, 250, 500, 1000, 2500, 5000)
+)
+ack_latency = metrics.histogram(
+    "agent_run_ingest_ack_latency_seconds",
+    "Time from enqueue until the runs were flushed",
+    label_names=["durability"]
+)
+runs_processed = metrics.counter(
+    "agent_run_ingest_runs_total",
+    "Agent runs handled by the ingestion buffer",
+    label_names=["result"]
+)
+
+
+@dataclass
+class _Ack:
+    """Tracks outstanding runs of one ingestion request"""
+    remaining: int
+    enqueued_at: float
+    durability: IngestDurability
+    future: Optional[asyncio.Future] = None
+
+    def flushed(self, count: int) -> None:
+        self.remaining -= count
+        if self.remaining == 0:
+            ack_latency.observe(time.perf_counter() - self.enqueued_at, durability=self.durability.value)
+            if self.future is not None and not self.future.done():
+                self.future.set_result(None)
+
+    def failed(self, exc: Exception) -> None:
+        if self.future is not None and not self.future.done():
+            self.future.set_exception(exc)
+
+
+@dataclass
+class _PendingRun:
+    row: Dict
+    ack: _Ack = field(repr=False)
+
+
+class RunIngestionBuffer:
+    """
+    Bounded write-behind buffer for agent runs.
+
+    Runs are appended to an in-process queue and written by a background
+    flusher with one multi-row INSERT per batch, either when the batch size
+    is reached or when the oldest buffered run has waited for the flush
+    interval.
+    """
+
+    def __init__(self, max_size: int, flush_batch_size: int, flush_interval: float):
+        self.max_size = max_size
+        self.flush_batch_size = flush_batch_size
+        self.flush_interval = flush_interval
+        self._pending: Deque[_PendingRun] = deque()
+        self._not_empty: Optional[asyncio.Event] = None
+        self._batch_ready: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        buffer_depth.set_function(lambda: len(self._pending))
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def start(self) -> None:
+        """Start the background flusher on the running event loop"""
+        if self._task is not None:
+            return
+        self._closing = False
+        self._not_empty = asyncio.Event()
+        self._batch_ready = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop accepting runs and flush everything still buffered"""
+        if self._task is None:
+            return
+        self._closing = True
+        self._not_empty.set()
+        self._batch_ready.set()
+        await self._task
+        self._task = None
+        while self._pending:
+            await self._flush(self._take_batch())
+
+    async def ingest(
+        self,
+        project_id: UUID,
+        runs: List[AgentRunCreate],
+        durability: IngestDurability
+    ) -> List[UUID]:
+        """
+        Buffer agent runs for a project.
+
+        Args:
+            project_id: The project the runs belong to
+            runs: Runs to buffer
+            durability: Return once the runs are flushed, or once they are buffered
+
+        Returns:
+            IDs assigned to the runs
+
+        Raises:
+            IngestionBatchTooLargeException: If the runs could never fit in the buffer
+            IngestionBufferFullException: If the buffer cannot hold the runs right now
+            IngestionFailedException: If the runs could not be flushed (flush durability only)
+        """
+        run_ids, flushed = self.enqueue(project_id, runs, durability)
+        await self.wait_flushed(flushed)
+        return run_ids
+
+    def enqueue(
+        self,
+        project_id: UUID,
+        runs: List[AgentRunCreate],
+        durability: IngestDurability
+    ) -> Tuple[List[UUID], Optional[asyncio.Future]]:
+        """
+        Buffer agent runs without waiting for them to be flushed.
+
+        The runs are buffered when this returns; pass the future to
+        wait_flushed to wait for the write.
+
+        Returns:
+            IDs assigned to the runs, and for flush durability a future
+            resolved once they are written
+
+        Raises:
+            IngestionBatchTooLargeException: If the runs could never fit in the buffer
+            IngestionBufferFullException: If the buffer cannot hold the runs right now
+        """
+        if len(runs) > self.max_size:
+            runs_processed.inc(len(runs), result="rejected")
+            raise IngestionBatchTooLargeException(self.max_size)
+
+        if self._task is None or self._closing or len(self._pending) + len(runs) > self.max_size:
+            runs_processed.inc(len(runs), result="rejected")
+            raise IngestionBufferFullException()
+
+        if not runs:
+            return [], None
+
+        ack = _Ack(remaining=len(runs), enqueued_at=time.perf_counter(), durability=durability)
+        if durability is IngestDurability.FLUSH:
+            ack.future = asyncio.get_running_loop().create_future()
+
+        run_ids = []
+        for run in runs:
+            run_id = uuid.uuid4()
+            run_ids.append(run_id)
+            self._pending.append(_PendingRun(
+                row={
+                    "id": run_id,
+                    "project_id": project_id,
+                    "input": run.input,
+                    "output": run.output,
+                    "version": run.version,
+                },
+                ack=ack
+            ))
+
+        self._not_empty.set()
+        if len(self._pending) >= self.flush_batch_size:
+            self._batch_ready.set()
+
+        return run_ids, ack.future
+
+    @staticmethod
+    async def wait_flushed(flushed: Optional[asyncio.Future]) -> None:
+        """
+        Wait for runs returned by enqueue to be written.
+
+        Raises:
+            IngestionFailedException: If the runs were dropped instead
+        """
+        if flushed is None:
+            return
+        try:
+            await flushed
+        except Exception:
+            raise IngestionFailedException()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while not self._closing:
+            await self._not_empty.wait()
+            deadline = loop.time() + self.flush_interval
+            while len(self._pending) < self.flush_batch_size and not self._closing:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                self._batch_ready.clear()
+                try:
+                    await asyncio.wait_for(self._batch_ready.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if self._pending:
+                await self._flush(self._take_batch())
+
+    def _take_batch(self) -> List[_PendingRun]:
+        count = min(len(self._pending), self.flush_batch_size)
+        batch = [self._pending.popleft() for _ in range(count)]
+        if not self._pending and not self._closing:
+            self._not_empty.clear()
+        return batch
+
+    async def _flush(self, batch: List[_PendingRun]) -> None:
+        started = time.perf_counter()
+        try:
+            await run_in_threadpool(self._write, [item.row for item in batch])
+        except IntegrityError:
+            # One bad request (e.g. its project was deleted meanwhile) must not
+            # fail the whole batch, so retry each request's runs on their own.
+            await self._flush_per_request(batch)
+        except Exception as exc:
+            self._fail(batch, exc)
+        else:
+            self._acknowledge(batch)
+        finally:
+            flush_duration.observe(time.perf_counter() - started)
+            flush_batch_size.observe(len(batch))
+
+    async def _flush_per_request(self, batch: List[_PendingRun]) -> None:
+        groups: Dict[int, List[_PendingRun]] = {}
+        for item in batch:
+            groups.setdefault(id(item.ack), []).append(item)
+        for items in groups.values():
+            try:
+                await run_in_threadpool(self._write, [item.row for item in items])
+            except Exception as exc:
+                self._fail(items, exc)
+            else:
+                self._acknowledge(items)
+
+    def _acknowledge(self, items: List[_PendingRun]) -> None:
+        runs_processed.inc(len(items), result="flushed")
+        counts: Dict[int, int] = {}
+        acks: Dict[int, _Ack] = {}
+        for item in items:
+            counts[id(item.ack)] = counts.get(id(item.ack), 0) + 1
+            acks[id(item.ack)] = item.ack
+        for key, ack in acks.items():
+            ack.flushed(counts[key])
+
+    def _fail(self, items: List[_PendingRun], exc: Exception) -> None:
+        runs_processed.inc(len(items), result="failed")
+        print(f"Failed to flush {len(items)} agent runs: {exc}")
+        for item in items:
+            item.ack.failed(exc)
+
+    @staticmethod
+    def _write(rows: List[Dict]) -> None:
+        # executemany of a single INSERT is rendered by the psycopg2 dialect as
+        # batched multi-row VALUES statements, all within one transaction
+        # together with the project counter updates.
+        with engine.begin() as connection:
+            lock_run_counters(connection)
+            connection.execute(insert(AgentRun.__table__), rows)
+            increment_run_counters(connection, rows)
+
+
+run_ingestion_buffer = RunIngestionBuffer(
+    max_size=settings.INGEST_BUFFER_MAX_SIZE,
+    flush_batch_size=settings.INGEST_FLUSH_BATCH_SIZE,
+    flush_interval=settings.INGEST_FLUSH_INTERVAL_MS / 1000
+)
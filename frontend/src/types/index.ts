@@ -12,6 +12,19 @@ export interface Project {
   description: string | null;
   created_at: string;
   updated_at: string;
+  run_count: number;
+  last_run_at: string | null;
+}
+
+export interface AgentRunSummary {
+  id: string;
+  version: string | null;
+  created_at: string;
+  updated_at: string;
+}
+
+export interface ProjectDetail extends Project {
+  recent_runs: AgentRunSummary[] | null;
 }
 
 export interface ProjectListResponse {